@@ -0,0 +1,260 @@
+import glob
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+from controllers.board_loader import BoardLoader
+from controllers.board_solver import BoardSolver, SearchLimitExceeded
+from multiprocessing import connection
+from optparse import OptionParser
+from util import MoveModel
+
+
+def solve_task(task, settings):
+    """Solve one board task in a worker process and return its result record.
+
+    A task is a dict with an "id" and either the "path" of a board file, the board "text" or
+    the "error" that kept it from being read.
+    """
+    start_time = time.perf_counter()
+    result = {"id": task["id"], "status": "error", "moves": None, "expanded_nodes": 0}
+    solver = None
+    try:
+        if "error" in task:
+            raise ValueError(task["error"])
+        loader = BoardLoader()
+        game_board = loader.load(task["path"]) if "path" in task else loader.parse(task["text"])
+        solver = BoardSolver(game_board, MoveModel(settings["move_model"]))
+        solver.set_limits(settings["node_limit"], settings["time_limit"])
+        solution = solver.solve(settings["algorithm"], settings["heuristic"])
+        if solution is None:
+            result["status"] = "unsolvable"
+        else:
+            result["status"] = "solved"
+            result["moves"] = [[vehicle.get_name(), direction.value, distance] for vehicle, direction, distance in solution]
+            result["num_moves"] = len(solution)
+            result["num_steps"] = solver.count_steps(solution)
+            result["num_slides"] = solver.count_slides(solution)
+    except SearchLimitExceeded as error:
+        result["status"] = error.limit
+    except Exception as error:
+        result["error"] = str(error)
+    if solver is not None:
+        result["expanded_nodes"] = solver.expanded_nodes
+    result["seconds"] = time.perf_counter() - start_time
+    return result
+
+
+def serve_tasks(tasks, settings):
+    """Solve the tasks received through a connection and send back their results, until sent None."""
+    # A worker killed for running out of time exits through SystemExit, so temporary files are removed.
+    signal.signal(signal.SIGTERM, lambda signal_number, frame: sys.exit(1))
+    while True:
+        task = tasks.recv()
+        if task is None:
+            return
+        tasks.send(solve_task(task, settings))
+
+
+class BatchSolver:
+    """Headless solver for many boards at once, streaming one JSON line per board."""
+
+    # Algorithms that start processes of their own, which the batch's worker processes cannot do.
+    PROCESS_ALGORITHMS = ("parallel_bfs", "parallel_a_star", "portfolio")
+    # Seconds a board may run past its time limit, which the searches check themselves, before its worker is killed.
+    KILL_GRACE = 1.0
+
+    def __init__(self, options):
+        """Initialize the batch solver with provided options."""
+        self.workers = options.workers or os.cpu_count()
+        self.kill_time = None if options.time_limit is None else options.time_limit + self.KILL_GRACE
+        self.settings = {
+            "algorithm": options.algorithm,
+            "heuristic": options.heuristic,
+            "move_model": MoveModel(options.move_model).value,
+            "node_limit": options.node_limit,
+            "time_limit": options.time_limit,
+        }
+
+    def collect_tasks(self, sources, stream):
+        """Yield a task for every board file in the sources, or for every JSON line of the stream without sources.
+
+        A source is a directory, whose .txt files are taken, or a file name or glob pattern. A
+        JSON line is an object with the "board" as text or as a list of rows and an optional "id".
+        """
+        if not sources or sources == ["-"]:
+            for line_number, line in enumerate(stream, start=1):
+                if line.strip():
+                    yield self.parse_line(line, line_number)
+            return
+
+        for source in sources:
+            pattern = os.path.join(source, "*.txt") if os.path.isdir(source) else source
+            paths = sorted(glob.glob(pattern))
+            if not paths:
+                yield {"id": source, "error": f"No board files match '{source}'."}
+            for path in paths:
+                yield {"id": path, "path": path}
+
+    @staticmethod
+    def parse_line(line, line_number):
+        """Turn one JSON line into a task, identified by its line number unless it has an id."""
+        try:
+            record = json.loads(line)
+            board = record["board"]
+            text = "\n".join(board) if isinstance(board, list) else board
+            return {"id": record.get("id", line_number), "text": text}
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            return {"id": line_number, "error": f"Invalid board line: {error}"}
+
+    def run(self, sources, stream=sys.stdin, output=sys.stdout):
+        """Solve every board on worker processes and write the results as they complete.
+
+        A board still running kill_time seconds after it started has its worker killed and
+        replaced, which also stops the searches that never check the time limit themselves. A
+        worker that dies is replaced too, and the board it was solving is reported as an error.
+        Tasks are read on a thread, so a slow stream never holds back results or kills.
+        """
+        tasks = self.read_tasks(sources, stream)
+        idle = []
+        # Every busy worker's connection maps to (process, task, start time).
+        busy = {}
+        more_tasks = True
+        try:
+            while True:
+                while more_tasks and len(busy) < self.workers and tasks.poll():
+                    task = tasks.recv()
+                    if task is None:
+                        more_tasks = False
+                        break
+                    worker, process = idle.pop() if idle else self.start_worker()
+                    worker.send(task)
+                    busy[worker] = (process, task, time.perf_counter())
+                if not busy and not more_tasks:
+                    return
+
+                waiting = list(busy) + [process.sentinel for process, task, start_time in busy.values()]
+                if more_tasks and len(busy) < self.workers:
+                    waiting.append(tasks)
+                timeout = None
+                if self.kill_time is not None and busy:
+                    timeout = max(0, min(start_time for process, task, start_time in busy.values()) + self.kill_time - time.perf_counter())
+                connection.wait(waiting, timeout)
+                for worker, (process, task, start_time) in list(busy.items()):
+                    try:
+                        result = worker.recv() if worker.poll() else None
+                    except EOFError:
+                        result = None
+                    seconds = time.perf_counter() - start_time
+                    if result is not None:
+                        idle.append((worker, process))
+                    elif process.is_alive() and (self.kill_time is None or seconds < self.kill_time):
+                        continue
+                    else:
+                        alive = process.is_alive()
+                        self.stop_worker(worker, process)
+                        result = {"id": task["id"], "status": "time_limit" if alive else "error", "moves": None, "expanded_nodes": 0}
+                        if not alive:
+                            result["error"] = f"The worker process exited with code {process.exitcode}."
+                        result["seconds"] = seconds
+                    del busy[worker]
+                    self.write(result, output)
+        finally:
+            tasks.close()
+            for worker, process in idle:
+                worker.send(None)
+                process.join()
+            for worker, (process, task, start_time) in busy.items():
+                self.stop_worker(worker, process)
+
+    def read_tasks(self, sources, stream):
+        """Start a thread sending every task, then None, through a connection and return its receiving end."""
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+
+        def send_tasks():
+            try:
+                for task in self.collect_tasks(sources, stream):
+                    sender.send(task)
+            finally:
+                sender.send(None)
+
+        threading.Thread(target=send_tasks, daemon=True).start()
+        return receiver
+
+    def start_worker(self):
+        """Start a worker process and return its connection and the process."""
+        worker, connection_end = multiprocessing.Pipe()
+        process = multiprocessing.Process(target=serve_tasks, args=(connection_end, self.settings), daemon=True)
+        process.start()
+        connection_end.close()
+        return worker, process
+
+    @staticmethod
+    def stop_worker(worker, process):
+        """Kill a worker process and close its connection."""
+        process.terminate()
+        process.join()
+        worker.close()
+
+    @staticmethod
+    def write(result, output):
+        """Write one result as a JSON line."""
+        output.write(json.dumps(result) + "\n")
+        output.flush()
+
+
+def main():
+    """Main function to parse command-line options and start the batch."""
+    usage_str = """
+    USAGE:      python batch.py <options> [directory | file | glob ...]
+    EXAMPLES:   python batch.py boards
+                    - Solves every .txt board in the boards directory.
+                OR python batch.py --algorithm bfs --time-limit 10 "generated/*.txt"
+                    - Solves the matching boards with BFS, giving up on a board after 10 seconds.
+                OR python batch.py < boards.jsonl
+                    - Solves the boards of a JSONL stream such as {"id": 1, "board": ["AA...O", ...]}.
+    Results are written to stdout as JSON lines in the order the boards finish.
+    """
+    parser = OptionParser(usage=usage_str)
+    parser.add_option(
+        "-f",
+        "--algorithm",
+        dest="algorithm",
+        default="a_star",
+        help="Search algorithm to use (see game.py, except parallel_bfs, parallel_a_star and portfolio).",
+    )
+    parser.add_option(
+        "--heuristic", dest="heuristic", default="blockingHeuristic", help="Heuristic function for the A* and IDA* algorithms."
+    )
+    parser.add_option("-m", "--moves", dest="move_model", default="step", help="Move model (step or slide).")
+    parser.add_option("-w", "--workers", dest="workers", type="int", default=None, help="Worker processes (one per CPU by default).")
+    parser.add_option(
+        "--node-limit",
+        dest="node_limit",
+        type="int",
+        default=None,
+        help="Most nodes a board may expand before it is given up (bfs, frontier, bidirectional, dfs, a_star, ida_star and cluster).",
+    )
+    parser.add_option(
+        "--time-limit",
+        dest="time_limit",
+        type="float",
+        default=None,
+        help="Most seconds a board may search before it is given up; a worker still busy a second later is killed.",
+    )
+
+    (options, args) = parser.parse_args()
+    if options.algorithm in BatchSolver.PROCESS_ALGORITHMS:
+        parser.error(f"The {options.algorithm} algorithm starts processes of its own and cannot run in a batch.")
+
+    try:
+        BatchSolver(options).run(args)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import numpy as np
+from util import MoveModel
+
+
+class BatchedSearch:
+    """Breadth first search over whole layers of packed states at once.
+
+    Every layer is a sorted NumPy array of uint64 state keys (see BitBoard.get_key). The
+    successors of a layer are generated with vectorized lookups into per-vehicle tables of
+    body and target masks, and duplicates are removed with np.unique and binary searches
+    of the sorted layers instead of one Python set operation per state. Moves are reversible, so
+    only the current and previous layers are needed to drop states already seen.
+    """
+
+    # Small chunks keep the successor arrays in cache and the limits checked often.
+    CHUNK_SIZE = 1 << 13
+
+    def __init__(self, board):
+        """Build the NumPy lookup tables for a BitBoard."""
+        if board.key_bits > 64 or board.cells > 64:
+            raise ValueError("The board is too large for 64-bit packed states.")
+
+        self.board = board
+        self.expanded_nodes = 0
+        # Offsets are padded to the full field width; padded entries are never valid.
+        size = 1 << board.field_bits
+        self.bodies = []
+        self.forward_targets = []
+        self.forward_valid = []
+        self.backward_targets = []
+        self.backward_valid = []
+        for index in range(len(board.vehicles)):
+            bodies = np.zeros(size, dtype=np.uint64)
+            forward_targets = np.zeros(size, dtype=np.uint64)
+            forward_valid = np.zeros(size, dtype=bool)
+            backward_targets = np.zeros(size, dtype=np.uint64)
+            backward_valid = np.zeros(size, dtype=bool)
+            for offset in range(board.max_offsets[index] + 1):
+                bodies[offset] = board.body_masks[index][offset]
+                if board.forward_masks[index][offset] is not None:
+                    forward_targets[offset] = board.forward_masks[index][offset]
+                    forward_valid[offset] = True
+                if board.backward_masks[index][offset] is not None:
+                    backward_targets[offset] = board.backward_masks[index][offset]
+                    backward_valid[offset] = True
+            self.bodies.append(bodies)
+            self.forward_targets.append(forward_targets)
+            self.forward_valid.append(forward_valid)
+            self.backward_targets.append(backward_targets)
+            self.backward_valid.append(backward_valid)
+
+        main = board.main_index
+        front = board.lengths[main] - 1
+        self.goal_offsets = np.zeros(size, dtype=bool)
+        for offset in range(board.max_offsets[main] + 1):
+            self.goal_offsets[offset] = board.lane_cells[main][offset + front] % board.width == board.width - 1
+
+    def get_offsets(self, keys, index):
+        """Return the lane offsets of one vehicle in every key."""
+        shift = np.uint64(index * self.board.field_bits)
+        return ((keys >> shift) & np.uint64(self.board.field_mask)).astype(np.intp)
+
+    def is_solved(self, keys):
+        """Return which keys have the main vehicle at the exit."""
+        return self.goal_offsets[self.get_offsets(keys, self.board.main_index)]
+
+    def expand(self, keys):
+        """Return the keys of all successors of the given keys, unsorted and with repeats."""
+        self.expanded_nodes += len(keys)
+        offsets = [self.get_offsets(keys, index) for index in range(len(self.board.vehicles))]
+        occupancy = np.zeros(len(keys), dtype=np.uint64)
+        for index, vehicle_offsets in enumerate(offsets):
+            occupancy |= self.bodies[index][vehicle_offsets]
+
+        last = (1 << self.board.field_bits) - 1
+        slide = self.board.move_model == MoveModel.SLIDE
+        children = []
+        for index in self.board.movable:
+            unit = np.uint64(1 << (index * self.board.field_bits))
+            for targets, valid, sign in ((self.forward_targets, self.forward_valid, 1), (self.backward_targets, self.backward_valid, -1)):
+                movable = np.ones(len(keys), dtype=bool)
+                distance = 0
+                while True:
+                    # Offset the vehicle moves from on this step; off-lane offsets map to a padded entry.
+                    step_offsets = offsets[index] + sign * distance
+                    step_offsets = np.where((step_offsets >= 0) & (step_offsets <= last), step_offsets, last)
+                    movable &= valid[index][step_offsets] & ((occupancy & targets[index][step_offsets]) == 0)
+                    if not movable.any():
+                        break
+                    distance += 1
+                    change = unit * np.uint64(distance)
+                    children.append(keys[movable] + change if sign > 0 else keys[movable] - change)
+                    if not slide:
+                        break
+
+        if not children:
+            return np.empty(0, dtype=np.uint64)
+        return np.concatenate(children)
+
+    def layers(self, sources, check=None):
+        """Yield the breadth first layers around the source keys as sorted uint64 arrays.
+
+        A layer is expanded CHUNK_SIZE keys at a time, so the repeated successors never take
+        much more memory than the layers themselves. check, if given, is called with the
+        number of nodes expanded so far before every chunk, and may raise to stop the search.
+        """
+        previous = np.empty(0, dtype=np.uint64)
+        current = np.unique(np.asarray(sources, dtype=np.uint64))
+        while len(current):
+            yield current
+            chunks = []
+            for start in range(0, len(current), self.CHUNK_SIZE):
+                if check is not None:
+                    check(self.expanded_nodes)
+                children = np.unique(self.expand(current[start : start + self.CHUNK_SIZE]))
+                chunks.append(children[~(self.contains(current, children) | self.contains(previous, children))])
+            previous, current = current, np.unique(np.concatenate(chunks))
+
+    @staticmethod
+    def contains(layer, keys):
+        """Return which keys are in a sorted layer."""
+        if not len(layer):
+            return np.zeros(len(keys), dtype=bool)
+        positions = np.minimum(np.searchsorted(layer, keys), len(layer) - 1)
+        return layer[positions] == keys
+
+    def search(self, state):
+        """Return an optimal list of (vehicle index, direction, distance) moves from a state, or None."""
+        layers = []
+        for layer in self.layers([self.board.get_key(state)]):
+            layers.append(layer)
+            solved = self.is_solved(layer)
+            if solved.any():
+                return self.get_path(layers, int(layer[np.argmax(solved)]))
+        return None
+
+    def get_path(self, layers, key):
+        """Walk back from a key in the last layer to the first one, one stored layer at a time."""
+        path = []
+        state = self.board.from_key(key)
+        for layer in reversed(layers[:-1]):
+            for move, parent in self.board.successors(state):
+                parent_key = self.board.get_key(parent)
+                position = int(np.searchsorted(layer, parent_key))
+                if position < len(layer) and int(layer[position]) == parent_key:
+                    path.append(self.board.inverse_move(move))
+                    state = parent
+                    break
+        path.reverse()
+        return path
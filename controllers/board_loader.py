@@ -18,6 +18,14 @@ class BoardLoader:
         self.parse_to_objects(content)
         return self.game_board
 
+    def parse(self, text):
+        """Load the game board from its text, one line per row as in a board file."""
+        self.filename = None
+        content = text.splitlines()
+        self.validate(content)
+        self.parse_to_objects(content)
+        return self.game_board
+
     def read(self):
         """Read the content of the game board file."""
         try:
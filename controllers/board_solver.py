@@ -1,22 +1,62 @@
 import threading
-from copy import deepcopy
-from util import Direction, Orientation
+import time
+from collections import deque
+from controllers.batched_search import BatchedSearch
+from controllers.cluster_table import ClusterTable
+from controllers.external_search import ExternalSearch
+from controllers.parallel_search import DistributedAStar, ParallelSearch
+from controllers.pattern_database import PatternDatabase
+from models.bitboard import BitBoard
+from util import MoveModel
 import util
 
 
+class SearchLimitExceeded(Exception):
+    """Raised when a search expands more nodes or runs longer than BoardSolver.set_limits allows."""
+
+    def __init__(self, limit):
+        super().__init__(f"The search exceeded its {limit.replace('_', ' ')}.")
+        self.limit = limit
+
+
 class Node:
-    def __init__(self, state, path, cost):
+    __slots__ = ("state", "parent", "move", "cost", "heuristic")
+
+    def __init__(self, state, parent=None, move=None, cost=0, heuristic=0):
         self.state = state
-        self.path = path
+        self.parent = parent
+        self.move = move
         self.cost = cost
+        self.heuristic = heuristic
+
+    def get_path(self):
+        """Rebuild the moves leading to this node by walking the parent chain."""
+        path = []
+        node = self
+        while node.parent is not None:
+            path.append(node.move)
+            node = node.parent
+        path.reverse()
+        return path
 
 
 class BoardSolver(object):
-    def __init__(self, game_board):
+    def __init__(self, game_board, move_model=MoveModel.STEP):
         self.game_board = game_board
+        self.move_model = move_model
+        self.board = BitBoard(game_board, move_model)
+        self.pattern_directory = PatternDatabase.DIRECTORY
+        self.cluster_directory = ClusterTable.DIRECTORY
+        self.cluster_tables = []
         # self.console_view = console_view
         self.solution = None
         self.expanded_nodes = 0
+        self.cutoff = False
+        self.iterations = []
+        self.stale_entries = 0
+        self.peak_open_size = 0
+        self.node_limit = None
+        self.deadline = None
 
     def display_grid(self, grid, height, width):
         """Display the loaded game board."""
@@ -36,249 +76,594 @@ class BoardSolver(object):
 
     def from_moves_to_grids(self, moves):
         """Convert moves to grids."""
-        grids = [self.game_board.get_grid()]
+        state = self.board.get_initial_state()
+        grids = [self.board.to_grid(state)]
         for move in moves:
-            grid = deepcopy(grids[-1])
             vehicle = move[0]
             direction = move[1]
-            old_locations = vehicle.get_occupied_locations()
+            distance = move[2]
+            state = self.board.apply_move(state, self.board.index_of(vehicle.get_name()), direction, distance)
+            grids.append(self.board.to_grid(state))
+        return grids
 
-            if direction == Direction.FORWARD:
-                vehicle.move_forward()
-            if direction == Direction.BACKWARD:
-                vehicle.move_backward()
+    def to_moves(self, path):
+        """Convert (vehicle index, direction, distance) moves to (vehicle, direction, distance) moves."""
+        return [(self.board.get_vehicle(index), direction, distance) for index, direction, distance in path]
 
-            new_locations = vehicle.get_occupied_locations()
-            grid = self.update_vehicle(grid, vehicle, old_locations, new_locations)
-            grids.append(grid)
-        return grids
+    @staticmethod
+    def count_steps(moves):
+        """Return the solution length in the step metric: every cell moved counts."""
+        return sum(move[2] for move in moves)
+
+    @staticmethod
+    def count_slides(moves):
+        """Return the solution length in the slide metric: consecutive moves of one vehicle in one direction count once."""
+        slides = 0
+        previous = None
+        for move in moves:
+            if previous is None or move[0].get_name() != previous[0].get_name() or move[1] != previous[1]:
+                slides += 1
+            previous = move
+        return slides
+
+    def set_limits(self, node_limit=None, time_limit=None):
+        """Stop later searches with SearchLimitExceeded after node_limit expanded nodes or time_limit seconds from now."""
+        self.node_limit = node_limit
+        self.deadline = None if time_limit is None else time.perf_counter() + time_limit
+
+    def expand(self, state):
+        """Return the successors of a state and count it as expanded, enforcing the limits set by set_limits."""
+        self.expanded_nodes += 1
+        self.check_limits()
+        return self.board.successors(state)
+
+    def check_limits(self):
+        """Raise SearchLimitExceeded if the limits set by set_limits have been passed."""
+        if self.node_limit is not None and self.expanded_nodes > self.node_limit:
+            raise SearchLimitExceeded("node_limit")
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise SearchLimitExceeded("time_limit")
+
+    def solve(self, algorithm, heuristic_name=None, workers=None, memory_limit=1000000, table_size=1 << 22):
+        """Solve the board with the named algorithm and return its moves, or None if it cannot be solved."""
+        match algorithm:
+            case "bfs":
+                return self.get_solution_BFS()
+            case "batched_bfs":
+                return self.batched_search()
+            case "external_bfs":
+                return self.external_search(memory_limit=memory_limit)
+            case "parallel_bfs":
+                return self.parallel_search(workers, table_size)
+            case "cluster":
+                return self.cluster_search()
+            case "frontier":
+                return self.frontier_search()
+            case "bidirectional":
+                return self.bidirectional_search()
+            case "dfs":
+                return self.dfs_search()
+            case "a_star":
+                return self.a_star_search(heuristic_name)
+            case "parallel_a_star":
+                return self.parallel_a_star_search(heuristic_name, workers)
+            case "ida_star":
+                return self.ida_star_search(heuristic_name)
+            case _:
+                raise ValueError(f"Unknown algorithm: {algorithm}")
+
+    def get_heuristic(self, heuristic_name):
+        """Return the heuristic function registered under the given name."""
+        return resolve_heuristic(self.board, heuristic_name, self.pattern_directory)
 
     def a_star_search(self, heuristic_name=None):
         """
         Search the node that has the lowest combined cost and heuristic first.
+
+        The open list is a util.BucketQueue keyed by f-value; among nodes of equal f the
+        deepest one is expanded first. The cheapest known cost of every state is kept by key,
+        so children that do not improve on it are never pushed, and queued entries that were
+        overtaken by a cheaper path are discarded when popped and counted in self.stale_entries.
         """
-        heuristic = None
-        if heuristic_name == "null_heuristic":
-            heuristic = null_heuristic
-        elif heuristic_name == "blockingHeuristic":
-            heuristic = blockingHeuristic
-        elif heuristic_name == "distance_from_the_exit_Heuristic":
-            heuristic = distance_from_the_exit_Heuristic
-        elif heuristic_name == "distancePlusBlockingHeuristic":
-            heuristic = distancePlusBlockingHeuristic
-
-        prior_queue = util.PriorityQueue()
-        visited = set()
-        game_board = self.game_board
-        nodes_info = Node(game_board.get_grid(), [], 0)
-        # prior_queue.push(nodes_info, nodes_info.cost + null_heuristic(start_state, problem))
-        prior_queue.push(nodes_info, nodes_info.cost + heuristic(game_board.get_grid(), game_board.get_height(), game_board.get_width()))
+        heuristic = self.get_heuristic(heuristic_name)
+
+        prior_queue = util.BucketQueue()
+        best_costs = {}
+        board = self.board
+        state = board.get_initial_state()
+        nodes_info = Node(state, heuristic=heuristic(state, board))
+        best_costs[board.get_key(nodes_info.state)] = 0
+        prior_queue.push(nodes_info, nodes_info.cost + nodes_info.heuristic, nodes_info.cost)
+        self.stale_entries = 0
+        self.peak_open_size = 1
 
         while not prior_queue.isEmpty():
             node = prior_queue.pop()
-            if self.is_solved(node.state):
-                self.display_grid(node.state, self.game_board.get_height(), self.game_board.get_width())
-
-                return node.path
-            if hash(str(node.state)) in visited:
+            if node.cost > best_costs[board.get_key(node.state)]:
+                self.stale_entries += 1
                 continue
+            if board.is_solved(node.state):
+                return self.to_moves(node.get_path())
+
+            for move, new_state in self.expand(node.state):
+                key = board.get_key(new_state)
+                cost = node.cost + 1
+                if key in best_costs and best_costs[key] <= cost:
+                    continue
+                best_costs[key] = cost
+                child_node = Node(new_state, node, move, cost, heuristic(new_state, board, (node.state, node.heuristic, move)))
+                prior_queue.push(child_node, child_node.cost + child_node.heuristic, child_node.cost)
+            self.peak_open_size = max(self.peak_open_size, len(prior_queue))
+
+        return None
 
-            # states.append([[[vehicle, direction]], new_grid])
-            # vehicle == successor
-            for [(vehicle, direction)], new_grid in self.get_states(node.state):
-                # print("successor",vehicle)
-                # print("direction",direction)
-                # print("new_grid",new_grid)
+    def parallel_a_star_search(self, heuristic_name=None, workers=None):
+        """
+        Run A* with the states split across worker processes by key hash.
 
-                child_node = Node(new_grid, node.path + [(vehicle, direction)], node.cost + 1)
-                prior_queue.push(child_node, child_node.cost + heuristic(child_node.state, game_board.get_height(), game_board.get_width()))
-                # prior_queue.push(child_node, child_node.cost + null_heuristic(successor, problem))
+        Each worker runs its own open list over the states it owns and sends the children it
+        generates to their owners; the workers proceed in synchronized rounds until no open
+        node can lead to a solution cheaper than the best one found (see DistributedAStar).
+        """
+        # Looking the heuristic up here rejects an unknown name and builds a missing pattern
+        # database once, before the workers look it up again in their own processes.
+        self.get_heuristic(heuristic_name)
+        engine = DistributedAStar(self.board, heuristic_name, workers, pattern_directory=self.pattern_directory)
+        path = engine.search(self.board.get_initial_state())
+        self.expanded_nodes += engine.expanded_nodes
+        return None if path is None else self.to_moves(path)
+
+    def ida_star_search(self, heuristic_name=None, table_size=1000000):
+        """
+        Run iterative-deepening A*, keeping the (threshold, expanded nodes) of every iteration in self.iterations.
 
-            visited.add(hash(str(node.state)))
+        As in dfs_search, a transposition table holds at most table_size states; 0 keeps memory linear in the solution depth.
+        """
+        heuristic = self.get_heuristic(heuristic_name)
+        state = self.board.get_initial_state()
+        value = heuristic(state, self.board)
+        threshold = value
+        self.iterations = []
+
+        while True:
+            expanded_nodes = self.expanded_nodes
+            path = []
+            next_threshold = self.threshold_search(state, 0, value, heuristic, threshold, path, {self.board.get_key(state)}, {}, table_size)
+            self.iterations.append((threshold, self.expanded_nodes - expanded_nodes))
+            if next_threshold is None:
+                return self.to_moves(path)
+            if next_threshold == float("inf"):
+                return None
+            threshold = next_threshold
+
+    def threshold_search(self, state, cost, value, heuristic, threshold, path, on_path, table, table_size):
+        """
+        Search below state, whose heuristic value is given, for a goal within the threshold,
+        appending the moves found to path.
 
-        return []
+        Return None when a goal is found, otherwise the smallest f-value that exceeded the threshold.
+        """
+        f = cost + value
+        if f > threshold:
+            return f
+        if self.board.is_solved(state):
+            return None
+
+        key = self.board.get_key(state)
+        best_cost = table.get(key)
+        if best_cost is not None and best_cost <= cost:
+            return float("inf")
+        if best_cost is not None or len(table) < table_size:
+            table[key] = cost
+
+        next_threshold = float("inf")
+        for move, new_state in self.expand(state):
+            key = self.board.get_key(new_state)
+            if key in on_path:
+                continue
+            path.append(move)
+            on_path.add(key)
+            new_value = heuristic(new_state, self.board, (state, value, move))
+            result = self.threshold_search(new_state, cost + 1, new_value, heuristic, threshold, path, on_path, table, table_size)
+            if result is None:
+                return None
+            on_path.remove(key)
+            path.pop()
+            next_threshold = min(next_threshold, result)
+        return next_threshold
 
     def get_solution_BFS(self):
         """Run the breadth first search algorithm to find the solution."""
-        grid = self.game_board.get_grid()
-        visited = set()
-        queue = [[[], grid]]
+        node = Node(self.board.get_initial_state())
+        visited = {self.board.get_key(node.state)}
+        queue = deque([node])
 
         while len(queue) > 0:
-            for item in range(len(queue)):
-                moves, grid = queue.pop(0)
-
-                if self.is_solved(grid):
-                    self.display_grid(grid, self.game_board.get_height(), self.game_board.get_width())
-                    return moves
+            node = queue.popleft()
 
-                for new_moves, new_grid in self.get_states(grid):
-                    if hash(str(new_grid)) not in visited:
-                        queue.append([moves + new_moves, new_grid])
-                        visited.add(hash(str(new_grid)))
+            if self.board.is_solved(node.state):
+                return self.to_moves(node.get_path())
 
-        self.display_grid(grid, self.game_board.get_height(), self.game_board.get_width())
+            for move, new_state in self.expand(node.state):
+                key = self.board.get_key(new_state)
+                if key not in visited:
+                    queue.append(Node(new_state, node, move, node.cost + 1))
+                    visited.add(key)
 
         return None
 
-    def get_states(self, grid):
-        """Calculate different possible states"""
-        states = []
-        self.expanded_nodes += 1
+    def batched_search(self):
+        """
+        Run breadth first search one whole layer at a time on NumPy arrays of packed states.
 
-        for row in range(self.game_board.get_height()):
-            for column in range(self.game_board.get_width()):
-                vehicle = grid[column][row]
-                if vehicle and vehicle.type != "broken_down":
-                    for direction in Direction:
-                        if self.is_movable(vehicle, direction, grid):
-                            new_grid = deepcopy(grid)
+        Finds the same optimal solutions as get_solution_BFS, but generates and deduplicates the
+        successors of a layer with vectorized operations (see BatchedSearch).
+        """
+        engine = BatchedSearch(self.board)
+        path = engine.search(self.board.get_initial_state())
+        self.expanded_nodes += engine.expanded_nodes
+        return None if path is None else self.to_moves(path)
 
-                            new_vehicle = new_grid[column][row]
+    def external_search(self, directory=None, memory_limit=1000000):
+        """
+        Run breadth first search with its layers kept in sorted files on disk.
 
-                            if direction == Direction.BACKWARD:
-                                new_vehicle.move_backward()
+        For boards whose state space does not fit in memory: at most memory_limit successor keys
+        are held at once, and duplicates are removed by merging files (see ExternalSearch).
+        """
+        engine = ExternalSearch(self.board, directory, memory_limit)
+        path = engine.search(self.board.get_initial_state())
+        self.expanded_nodes += engine.expanded_nodes
+        return None if path is None else self.to_moves(path)
 
-                            if direction == Direction.FORWARD:
-                                new_vehicle.move_forward()
+    def parallel_search(self, workers=None, table_size=1 << 22):
+        """
+        Run breadth first search with every layer split across worker processes by key hash.
 
-                            old_locations = vehicle.get_occupied_locations()
-                            new_locations = new_vehicle.get_occupied_locations()
-                            new_grid = self.update_vehicle(new_grid, new_vehicle, old_locations, new_locations)
-                            states.append([[[vehicle, direction]], new_grid])
-        return states
+        The workers share one table of visited states in shared memory, holding up to
+        table_size states, and send each new child to the worker that owns it (see ParallelSearch).
+        """
+        engine = ParallelSearch(self.board, workers, table_size)
+        path = engine.search(self.board.get_initial_state())
+        self.expanded_nodes += engine.expanded_nodes
+        return None if path is None else self.to_moves(path)
 
-    @staticmethod
-    def update_vehicle(grid, vehicle, old_locations, new_locations):
-        """Update grid with the vehicles' new location."""
-        for location in old_locations:
-            x = location["x"]
-            y = location["y"]
-            grid[x][y] = 0
-
-        for location in new_locations:
-            x = location["x"]
-            y = location["y"]
-            grid[x][y] = vehicle
-
-        return grid
-
-    def is_movable(self, vehicle, direction, grid):
-        """Check if vehicle object is movable to the next empty space."""
-        if vehicle.get_orientation() == Orientation.HORIZONTAL and direction == Direction.FORWARD:
-            location = vehicle.get_end_location()
-            x = location["x"] + 1
-            y = location["y"]
-
-            if x < self.game_board.get_width():
-                board_vehicle = grid[x][y]
-                if board_vehicle:
-                    return False
-            else:
-                return False
+    def cluster_search(self):
+        """
+        Solve the board from the distance table of its whole cluster.
 
-        if vehicle.get_orientation() == Orientation.HORIZONTAL and direction == Direction.BACKWARD:
-            location = vehicle.get_start_location()
-            x = location["x"] - 1
-            y = location["y"]
+        The first call for a cluster enumerates it and stores the exact distance to the goal of
+        every state in it (see ClusterTable); after that, solving any position of the cluster is
+        a greedy descent without search.
+        """
+        state = self.board.get_initial_state()
+        path = self.get_cluster_table(state).get_path(state)
+        return None if path is None else self.to_moves(path)
 
-            if x > -1:
-                board_vehicle = grid[x][y]
-                if board_vehicle:
-                    return False
-            else:
-                return False
+    def hint(self, grid):
+        """
+        Return the optimal next (vehicle, direction, distance) move from a display grid and the
+        number of moves left to solve it.
 
-        if vehicle.get_orientation() == Orientation.VERTICAL and direction == Direction.FORWARD:
-            location = vehicle.get_end_location()
-            x = location["x"]
-            y = location["y"] + 1
+        The answer is read from the cluster's distance table, which is built at most once per
+        cluster and kept in memory, so repeated hints never search. The move is None when the
+        grid is already solved, and both values are None when it cannot be solved. A cluster
+        too large for its table to be built raises ValueError.
+        """
+        state = self.board.from_grid(grid)
+        try:
+            table = self.get_cluster_table(state)
+        except ValueError as error:
+            raise ValueError(f"No hint can be given for this board. {error}") from error
+        distance = table.get_distance(state)
+        if distance == ClusterTable.UNSOLVABLE:
+            return None, None
+
+        step = table.get_next_move(state)
+        if step is None:
+            return None, distance
+        return self.to_moves([step[0]])[0], distance
+
+    def get_cluster_table(self, state):
+        """Return the distance table of a state's cluster, loading or building and saving it when needed."""
+        for table in self.cluster_tables:
+            if table.contains(state):
+                return table
+
+        table = ClusterTable.find(self.board, state, self.cluster_directory)
+        if table is None:
+            start_nodes = self.expanded_nodes
+
+            def check(expanded_nodes):
+                self.expanded_nodes = start_nodes + expanded_nodes
+                self.check_limits()
+
+            table = ClusterTable.build(self.board, state, check=check)
+            self.expanded_nodes = start_nodes + table.expanded_nodes
+            table.save(self.cluster_directory)
+        self.cluster_tables.append(table)
+        return table
+
+    def frontier_search(self):
+        """
+        Run breadth first search keeping only the last three layers instead of a closed set.
 
-            if y < self.game_board.get_height():
-                board_vehicle = grid[x][y]
-                if board_vehicle:
-                    return False
-            else:
-                return False
+        Moves are reversible, so every neighbour of a state in layer d lies in layer d - 1, d or
+        d + 1, and those three layers are enough to avoid expanding a state twice. Without a
+        closed set there are no parent pointers either: once the goal layer is known the path
+        is rebuilt by divide and conquer, searching again for a state halfway between the
+        start and the goal and recursing on both halves.
+        """
+        start = self.board.get_initial_state()
+        for depth, layer in enumerate(self.frontier_layers(start)):
+            for state in layer.values():
+                if self.board.is_solved(state):
+                    return self.to_moves(self.frontier_path(start, state, depth))
+        return None
 
-        if vehicle.get_orientation() == Orientation.VERTICAL and direction == Direction.BACKWARD:
-            location = vehicle.get_start_location()
-            x = location["x"]
-            y = location["y"] - 1
+    def frontier_layers(self, state):
+        """Yield the breadth first layers around a state as {key: state} dicts, keeping only three of them."""
+        previous = {}
+        current = {self.board.get_key(state): state}
+        while current:
+            yield current
+            layer = {}
+            for state in current.values():
+                for move, new_state in self.expand(state):
+                    key = self.board.get_key(new_state)
+                    if key not in previous and key not in current and key not in layer:
+                        layer[key] = new_state
+            previous, current = current, layer
+
+    def frontier_layer(self, state, depth):
+        """Return the states exactly depth moves away from a state."""
+        for layer_depth, layer in enumerate(self.frontier_layers(state)):
+            if layer_depth == depth:
+                return layer
+        return {}
+
+    def frontier_path(self, source, target, depth):
+        """Rebuild a shortest path of the given length between two states by divide and conquer."""
+        if depth == 0:
+            return []
+        if depth == 1:
+            target_key = self.board.get_key(target)
+            return [next(move for move, new_state in self.expand(source) if self.board.get_key(new_state) == target_key)]
+
+        half = depth // 2
+        middle_layer = self.frontier_layer(source, half)
+        middle = next(middle_layer[key] for key in self.frontier_layer(target, depth - half) if key in middle_layer)
+        del middle_layer
+        return self.frontier_path(source, middle, half) + self.frontier_path(middle, target, depth - half)
+
+    def bidirectional_search(self):
+        """
+        Run breadth first search from the start and from every goal state at once.
 
-            if y > -1:
-                board_vehicle = grid[x][y]
-                if board_vehicle:
-                    return False
+        The smaller frontier is expanded a whole layer at a time until the searches meet; goals are generated only as needed.
+        """
+        board = self.board
+        start = board.get_initial_state()
+        if board.is_solved(start):
+            return []
+
+        # Every visited key maps to (neighbour key toward its search's root, move between them, depth).
+        forward = {board.get_key(start): (None, None, 0)}
+        forward_frontier = [start]
+        goals = board.goal_states()
+        backward = {}
+        backward_frontier = []
+        all_goals = False
+
+        while forward_frontier and (backward_frontier or not all_goals):
+            while not all_goals and len(backward_frontier) <= len(forward_frontier):
+                state = next(goals, None)
+                if state is None:
+                    all_goals = True
+                    break
+                self.check_limits()
+                backward[board.get_key(state)] = (None, None, 0)
+                backward_frontier.append(state)
+
+            if not all_goals or len(forward_frontier) <= len(backward_frontier):
+                forward_frontier, meeting = self.expand_layer(forward_frontier, forward, backward, False)
+                if meeting is None and not all_goals:
+                    meeting = next((board.get_key(state) for state in forward_frontier if board.is_solved(state)), None)
+                    if meeting is not None:
+                        backward[meeting] = (None, None, 0)
             else:
-                return False
-
-        return True
+                backward_frontier, meeting = self.expand_layer(backward_frontier, backward, forward, True)
+            if meeting is not None:
+                return self.to_moves(self.join_paths(meeting, forward, backward))
 
-    def is_solved(self, grid):
-        """Check if game board is solved."""
-        for row in range(self.game_board.get_height()):
-            for column in range(self.game_board.get_width()):
-                vehicle = grid[column][row]
+        return None
 
-                if vehicle and vehicle.is_main_vehicle() and column == self.game_board.get_width() - 1:
-                    return True
-        return False
+    def expand_layer(self, frontier, visited, other, backward):
+        """Expand one breadth first layer, returning the next layer and the best meeting key found."""
+        layer = []
+        meeting = None
+        best_length = float("inf")
+        for state in frontier:
+            key = self.board.get_key(state)
+            depth = visited[key][2] + 1
+            for move, new_state in self.expand(state):
+                new_key = self.board.get_key(new_state)
+                if new_key in visited:
+                    continue
+                # The backward search records the move leading from the new state back toward the goal.
+                visited[new_key] = (key, self.board.inverse_move(move) if backward else move, depth)
+                layer.append(new_state)
+                if new_key in other and depth + other[new_key][2] < best_length:
+                    best_length = depth + other[new_key][2]
+                    meeting = new_key
+        return layer, meeting
 
+    @staticmethod
+    def join_paths(meeting, forward, backward):
+        """Join the forward path to the meeting key with the backward path from it to the goal."""
+        path = []
+        key = meeting
+        while forward[key][0] is not None:
+            key, move, depth = forward[key]
+            path.append(move)
+        path.reverse()
+
+        key = meeting
+        while backward[key][0] is not None:
+            key, move, depth = backward[key]
+            path.append(move)
+        return path
+
+    def dfs_search(self, table_size=1000000):
+        """
+        Run iterative-deepening depth first search to find the shortest solution.
 
-def distancePlusBlockingHeuristic(grid, height, width):
-    num_vehicles = 0
-    main_vehicle = None
-    for row in range(height):
-        for column in range(width):
-            vehicle = grid[column][row]
+        A transposition table of at most table_size entries prunes states already reached at no greater depth.
+        """
+        state = self.board.get_initial_state()
+        limit = 0
+
+        while True:
+            self.cutoff = False
+            path = []
+            if self.depth_limited_search(state, 0, limit, path, {self.board.get_key(state)}, {}, table_size):
+                return self.to_moves(path)
+            if not self.cutoff:
+                # Nothing was cut off by the depth limit: the whole reachable space was searched.
+                return None
+            limit += 1
+
+    def depth_limited_search(self, state, depth, limit, path, on_path, table, table_size):
+        """Search for a goal within limit moves of state, appending the moves found to path."""
+        if self.board.is_solved(state):
+            return True
+        if depth == limit:
+            self.cutoff = True
+            return False
+
+        key = self.board.get_key(state)
+        best_depth = table.get(key)
+        if best_depth is not None and best_depth <= depth:
+            return False
+        if best_depth is not None or len(table) < table_size:
+            table[key] = depth
+
+        for move, new_state in self.expand(state):
+            key = self.board.get_key(new_state)
+            if key in on_path:
+                continue
+            path.append(move)
+            on_path.add(key)
+            if self.depth_limited_search(new_state, depth + 1, limit, path, on_path, table, table_size):
+                return True
+            on_path.remove(key)
+            path.pop()
+        return False
 
-            if vehicle and vehicle.is_main_vehicle():
-                main_vehicle = (row, column)
+    def get_states(self, grid):
+        """Calculate the moves possible on a display grid and the grids they lead to."""
+        vehicles = {vehicle.get_name(): vehicle for vehicle in BitBoard.collect_vehicles(grid)}
+        states = []
+        for (index, direction, distance), new_state in self.board.successors(self.board.from_grid(grid)):
+            vehicle = vehicles[self.board.names[index]]
+            states.append([[[vehicle, direction, distance]], self.board.to_grid(new_state)])
+        return states
 
-    for column in range(main_vehicle[1], width):
-        vehicle = grid[column][main_vehicle[0]]
-        if vehicle and not vehicle.is_main_vehicle():
-            num_vehicles += 1
+    def is_solved(self, grid):
+        """Check if game board is solved."""
+        return self.board.is_solved(self.board.from_grid(grid))
 
-    # print("num_vehicles" , num_vehicles)
-    return num_vehicles + (width - main_vehicle[1] - 1)
 
+# Heuristics take the state, the BitBoard and optionally the (parent state, parent value, move)
+# that produced the state, in which case the value is updated from the parent's instead of
+# being evaluated from scratch.
 
-# How many cars are blocking the red car from exiting
-def distance_from_the_exit_Heuristic(grid, height, width):
-    main_vehicle = None
-    for row in range(height):
-        for column in range(width):
-            vehicle = grid[column][row]
 
-            if vehicle and vehicle.is_main_vehicle():
-                main_vehicle = (row, column)
+def resolve_heuristic(board, heuristic_name, pattern_directory=PatternDatabase.DIRECTORY):
+    """Return the heuristic function registered under the given name for a BitBoard."""
+    if heuristic_name == "null_heuristic":
+        return null_heuristic
+    elif heuristic_name == "blockingHeuristic":
+        return blockingHeuristic
+    elif heuristic_name == "distance_from_the_exit_Heuristic":
+        return distance_from_the_exit_Heuristic
+    elif heuristic_name == "distancePlusBlockingHeuristic":
+        return distancePlusBlockingHeuristic
+    elif heuristic_name == "recursiveBlockingHeuristic":
+        return recursiveBlockingHeuristic
+    elif heuristic_name == "patternDatabaseHeuristic":
+        return PatternDatabase(board, pattern_directory).heuristic
+    raise ValueError(f"Unknown heuristic: {heuristic_name}")
 
-    return width - main_vehicle[1] - 1
 
+def distancePlusBlockingHeuristic(state, board, parent=None):
+    if parent is not None:
+        parent_state, value, move = parent
+        if move[0] != board.main_index:
+            return value + board.exit_path_change(parent_state, state, move[0])
 
-# How many cars are blocking the red car from exiting
-def blockingHeuristic(grid, height, width):
-    num_vehicles = 0
-    main_vehicle = None
-    for row in range(height):
-        for column in range(width):
-            vehicle = grid[column][row]
+    return blockingHeuristic(state, board) + distance_from_the_exit_Heuristic(state, board)
 
-            if vehicle and vehicle.is_main_vehicle():
-                main_vehicle = (row, column)
 
-    for column in range(main_vehicle[1], width):
-        vehicle = grid[column][main_vehicle[0]]
-        if vehicle and not vehicle.is_main_vehicle():
-            num_vehicles += 1
+# How many moves the red car needs to reach the exit
+def distance_from_the_exit_Heuristic(state, board, parent=None):
+    if parent is not None:
+        parent_state, value, move = parent
+        if move[0] != board.main_index:
+            return value
 
-    # print("num_vehicles" , num_vehicles)
-    return num_vehicles
+    row, column = board.get_main_location(state)
+    return board.count_moves(board.width - column - 1)
 
 
-def null_heuristic(state, problem=None):
+# How many cars are blocking the red car from exiting
+def blockingHeuristic(state, board, parent=None):
+    if parent is not None:
+        parent_state, value, move = parent
+        if move[0] != board.main_index:
+            return value + board.exit_path_change(parent_state, state, move[0])
+
+    return board.count_exit_path_blockers(state)
+
+
+# Moves the red car needs, plus the moves every car on its path needs to clear it, plus one
+# move for each group of cars that must get out of the way of a blocking car first
+def recursiveBlockingHeuristic(state, board, parent=None):
+    row, column = board.get_main_location(state)
+    path = board.get_exit_path_mask(state)
+    blockers = board.get_vehicles_on(state, path)
+    moves = board.count_moves(board.width - column - 1)
+
+    # Vehicles outside the blockers of which at least one has to move before a blocker can clear.
+    obstructions = []
+    for index in blockers:
+        clearing_moves = []
+        if index in board.movable:
+            for cells, swept in board.get_clearing_moves(state, index, path):
+                obstructors = set(board.get_vehicles_on(state, swept))
+                # Broken-down vehicles never move, so they close the way for good.
+                if all(obstructor in board.movable for obstructor in obstructors):
+                    clearing_moves.append((cells, obstructors.difference(blockers)))
+
+        if not clearing_moves:
+            # The blocker can never leave the path, so any value is admissible; count one move.
+            moves += 1
+            continue
+        moves += min(board.count_moves(cells) for cells, obstructors in clearing_moves)
+        if all(obstructors for cells, obstructors in clearing_moves):
+            obstructions.append(set().union(*(obstructors for cells, obstructors in clearing_moves)))
+
+    # Each pairwise disjoint group needs a different vehicle to move at least once.
+    moved = set()
+    for obstructors in sorted(obstructions, key=len):
+        if moved.isdisjoint(obstructors):
+            moved |= obstructors
+            moves += 1
+
+    return moves
+
+
+def null_heuristic(state, problem=None, parent=None):
     """
     A heuristic function estimates the cost from the current state to the nearest
     goal in the provided SearchProblem.  This heuristic is trivial.
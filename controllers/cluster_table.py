@@ -0,0 +1,124 @@
+import os
+import numpy as np
+from controllers.batched_search import BatchedSearch
+
+
+class ClusterTable:
+    """Exact distance to the nearest goal of every state in a cluster.
+
+    A cluster is the set of states reachable from a position. Moves are reversible, so
+    breadth first search backward from the cluster's goal states reaches every state of
+    the cluster that can be solved at all. The table keeps the sorted state keys as uint64
+    and the distances as uint16 in two NumPy arrays, and is saved as one .npz file per
+    cluster under a directory named after the board layout. Solving any state of the
+    cluster is then a greedy descent to a successor one move closer to the goal.
+    """
+
+    DIRECTORY = "./cluster_tables"
+    UNSOLVABLE = 65535
+    # About 10 bytes per state once built, and several times that while the layers are expanded.
+    MAX_STATES = 20000000
+
+    def __init__(self, board, keys, distances):
+        """Wrap sorted state keys and their distances for a BitBoard."""
+        self.board = board
+        self.keys = keys
+        self.distances = distances
+        self.expanded_nodes = 0
+
+    @classmethod
+    def build(cls, board, state, max_states=MAX_STATES, check=None):
+        """Enumerate the cluster of a state and compute every distance in it.
+
+        A cluster of more than max_states states raises ValueError; check is passed on to
+        BatchedSearch.layers.
+        """
+        # Whole clusters are enumerated and ranked by distance a layer at a time on NumPy arrays.
+        engine = BatchedSearch(board)
+        layers = []
+        size = 0
+        for layer in engine.layers([board.get_key(state)], check):
+            size += len(layer)
+            if max_states is not None and size > max_states:
+                raise ValueError(f"The cluster has more than {max_states} states.")
+            layers.append(layer)
+        keys = np.sort(np.concatenate(layers))
+        del layers
+        distances = np.full(len(keys), cls.UNSOLVABLE, dtype=np.uint16)
+        for depth, layer in enumerate(engine.layers(keys[engine.is_solved(keys)], check)):
+            if depth >= cls.UNSOLVABLE:
+                raise ValueError(f"The cluster has states more than {cls.UNSOLVABLE - 1} moves from a goal.")
+            distances[np.searchsorted(keys, layer)] = depth
+
+        table = cls(board, keys, distances)
+        table.expanded_nodes = engine.expanded_nodes
+        return table
+
+    @classmethod
+    def find(cls, board, state, directory=DIRECTORY):
+        """Load the saved table of the cluster containing a state, or return None."""
+        layout_directory = os.path.join(directory, board.get_layout_key())
+        if not os.path.isdir(layout_directory):
+            return None
+        for name in sorted(os.listdir(layout_directory)):
+            if name.endswith(".npz"):
+                table = cls.load(board, os.path.join(layout_directory, name))
+                # Tables saved with uint8 distances capped them at 254, so they are rebuilt.
+                if table.distances.dtype == np.uint16 and table.contains(state):
+                    return table
+        return None
+
+    @classmethod
+    def load(cls, board, path):
+        """Load a table saved by save."""
+        with np.load(path) as data:
+            return cls(board, data["keys"], data["distances"])
+
+    def save(self, directory=DIRECTORY):
+        """Save the table under the board layout's directory and return its path."""
+        layout_directory = os.path.join(directory, self.board.get_layout_key())
+        os.makedirs(layout_directory, exist_ok=True)
+        # The smallest key names the cluster, since clusters never share states.
+        path = os.path.join(layout_directory, f"{int(self.keys[0]):016x}.npz")
+        temporary_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(temporary_path, keys=self.keys, distances=self.distances)
+        os.replace(temporary_path, path)
+        return path
+
+    def find_position(self, state):
+        """Return the position of a state's key in the table, or None if it is not in the cluster."""
+        key = self.board.get_key(state)
+        position = int(np.searchsorted(self.keys, key))
+        if position < len(self.keys) and int(self.keys[position]) == key:
+            return position
+        return None
+
+    def contains(self, state):
+        """Check if a state belongs to the cluster."""
+        return self.find_position(state) is not None
+
+    def get_distance(self, state):
+        """Return the number of moves left to solve a state of the cluster."""
+        return int(self.distances[self.find_position(state)])
+
+    def get_next_move(self, state):
+        """Return the (move, state) pair one move closer to the goal, or None at a goal or dead end."""
+        distance = self.get_distance(state)
+        if distance == 0 or distance == self.UNSOLVABLE:
+            return None
+        for move, new_state in self.board.successors(state):
+            if self.get_distance(new_state) == distance - 1:
+                return move, new_state
+        return None
+
+    def get_path(self, state):
+        """Return an optimal list of moves from a state of the cluster, or None if it cannot be solved."""
+        if self.get_distance(state) == self.UNSOLVABLE:
+            return None
+        path = []
+        step = self.get_next_move(state)
+        while step is not None:
+            move, state = step
+            path.append(move)
+            step = self.get_next_move(state)
+        return path
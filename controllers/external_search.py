@@ -0,0 +1,163 @@
+import heapq
+import os
+import tempfile
+
+
+class ExternalSearch:
+    """Breadth first search that keeps its layers on disk instead of in memory.
+
+    Every layer is a file of sorted, distinct state keys (see BitBoard.get_key), each stored
+    as a fixed-width big-endian record so that byte order and key order agree. The
+    successors of a layer are collected in memory until memory_limit keys are buffered,
+    then sorted and written out as a run file. Once the layer is expanded, the runs are
+    merged and duplicates are dropped in one pass, together with every key of the current
+    and previous layers (delayed duplicate detection). Moves are reversible, so no older
+    layer can contain a successor. When a layer has more than merge_files runs, groups of
+    them are first merged into longer runs, so the number of files open at once stays
+    bounded too. Only the buffer and one record per open file are ever in memory, and keys
+    are Python ints, so boards of any size work.
+    """
+
+    READ_RECORDS = 4096
+    MERGE_FILES = 64
+
+    def __init__(self, board, directory=None, memory_limit=1000000, merge_files=MERGE_FILES):
+        """Prepare a search of a BitBoard writing its files under directory (the system temporary directory by default).
+
+        Args:
+            board: The BitBoard to search.
+            directory: Where the temporary layer and run files are created.
+            memory_limit: The largest number of successor keys buffered in memory before a run is written.
+            merge_files: The largest number of runs merged at once, which bounds the files open at once.
+        """
+        self.board = board
+        self.directory = directory
+        self.memory_limit = memory_limit
+        self.merge_files = merge_files
+        self.record_size = max(1, (board.key_bits + 7) // 8)
+        self.expanded_nodes = 0
+        self.layer_sizes = []
+
+    def search(self, state):
+        """Return an optimal list of (vehicle index, direction, distance) moves from a state, or None."""
+        with tempfile.TemporaryDirectory(prefix="rush_hour_bfs_", dir=self.directory) as work_directory:
+            layers = [os.path.join(work_directory, "layer_0.bin")]
+            self.write_keys(layers[0], [self.board.get_key(state)])
+            self.layer_sizes = [1]
+
+            while self.layer_sizes[-1]:
+                goal = self.expand_layer(layers, work_directory)
+                if goal is not None:
+                    return self.get_path(layers, goal)
+            return None
+
+    def expand_layer(self, layers, work_directory):
+        """Write the next layer after the last one, or return the key of a solved state found in the last one."""
+        depth = len(layers) - 1
+        runs = []
+        buffer = []
+        for key in self.read_keys(layers[-1]):
+            state = self.board.from_key(key)
+            if self.board.is_solved(state):
+                return key
+            self.expanded_nodes += 1
+            for move, new_state in self.board.successors(state):
+                buffer.append(self.board.get_key(new_state))
+            if len(buffer) >= self.memory_limit:
+                runs.append(self.write_run(work_directory, depth, len(runs), buffer))
+                buffer = []
+        if buffer:
+            runs.append(self.write_run(work_directory, depth, len(runs), buffer))
+
+        runs = self.merge_runs(work_directory, depth, runs)
+        seen = heapq.merge(*(self.read_keys(path) for path in layers[-2:]))
+        layers.append(os.path.join(work_directory, f"layer_{depth + 1}.bin"))
+        self.layer_sizes.append(self.write_keys(layers[-1], self.subtract(heapq.merge(*(self.read_keys(path) for path in runs)), seen)))
+        for path in runs:
+            os.remove(path)
+        return None
+
+    def write_run(self, work_directory, depth, number, keys):
+        """Sort and deduplicate buffered keys into a run file and return its path."""
+        path = os.path.join(work_directory, f"run_{depth + 1}_0_{number}.bin")
+        self.write_keys(path, sorted(set(keys)))
+        return path
+
+    def merge_runs(self, work_directory, depth, runs):
+        """Merge groups of at most merge_files runs until no more than merge_files are left, and return them."""
+        generation = 0
+        while len(runs) > self.merge_files:
+            generation += 1
+            merged_runs = []
+            for start in range(0, len(runs), self.merge_files):
+                group = runs[start : start + self.merge_files]
+                path = os.path.join(work_directory, f"run_{depth + 1}_{generation}_{len(merged_runs)}.bin")
+                self.write_keys(path, self.subtract(heapq.merge(*(self.read_keys(run) for run in group)), iter(())))
+                for run in group:
+                    os.remove(run)
+                merged_runs.append(path)
+            runs = merged_runs
+        return runs
+
+    @staticmethod
+    def subtract(keys, seen):
+        """Yield the distinct keys of a sorted stream that are not in a second sorted stream."""
+        seen_key = next(seen, None)
+        previous = None
+        for key in keys:
+            if key == previous:
+                continue
+            previous = key
+            while seen_key is not None and seen_key < key:
+                seen_key = next(seen, None)
+            if key != seen_key:
+                yield key
+
+    def write_keys(self, path, keys):
+        """Write keys as fixed-width records and return how many were written."""
+        count = 0
+        with open(path, "wb") as file:
+            for key in keys:
+                file.write(key.to_bytes(self.record_size, "big"))
+                count += 1
+        return count
+
+    def read_keys(self, path):
+        """Yield the keys of a file in order, reading a block of records at a time."""
+        with open(path, "rb") as file:
+            while True:
+                block = file.read(self.record_size * self.READ_RECORDS)
+                if not block:
+                    return
+                for start in range(0, len(block), self.record_size):
+                    yield int.from_bytes(block[start : start + self.record_size], "big")
+
+    def contains(self, path, key):
+        """Check if a layer file holds a key, by binary search over its records."""
+        record = key.to_bytes(self.record_size, "big")
+        with open(path, "rb") as file:
+            low, high = 0, os.path.getsize(path) // self.record_size
+            while low < high:
+                middle = (low + high) // 2
+                file.seek(middle * self.record_size)
+                found = file.read(self.record_size)
+                if found == record:
+                    return True
+                if found < record:
+                    low = middle + 1
+                else:
+                    high = middle
+        return False
+
+    def get_path(self, layers, key):
+        """Walk back from a key in the last layer to the first one, one layer file at a time."""
+        path = []
+        state = self.board.from_key(key)
+        for layer in reversed(layers[:-1]):
+            for move, parent in self.board.successors(state):
+                if self.contains(layer, self.board.get_key(parent)):
+                    path.append(self.board.inverse_move(move))
+                    state = parent
+                    break
+        path.reverse()
+        return path
@@ -0,0 +1,376 @@
+import multiprocessing
+import os
+from multiprocessing import connection
+from controllers.pattern_database import PatternDatabase
+from controllers.shared_table import SharedStateTable, mix
+import util
+
+
+def get_owner(key, workers):
+    """Return the number of the worker that owns a state key."""
+    return mix(key, 0x9E3779B97F4A7C15) % workers
+
+
+class PartitionWorker:
+    """Base class of the worker processes of a ParallelSearch.
+
+    A worker expands the states whose keys hash to it (see get_owner). Whenever it hands
+    children on, it sends every worker exactly one batch of the children that worker owns
+    and then waits for one batch from every worker, so receiving all the batches is the
+    barrier that ends the step. Replies go back to the coordinating process through results,
+    the sending end of a pipe. Subclasses define step, the work done per step, setup, which
+    prepares what can only be built inside the worker process, and answer, for any other
+    command.
+    """
+
+    def __init__(self, board, number, commands, inboxes, results):
+        """Set up the worker state that is sent to the process; the process runs run()."""
+        self.board = board
+        self.number = number
+        self.workers = len(inboxes)
+        self.commands = commands
+        self.inboxes = inboxes
+        self.results = results
+
+    def owns(self, key):
+        """Check if a state key belongs to this worker."""
+        return get_owner(key, self.workers) == self.number
+
+    def run(self):
+        """Serve commands from the coordinating process until told to stop."""
+        try:
+            self.setup()
+        except Exception as error:
+            self.results.send(error)
+            return
+        while True:
+            command, argument = self.commands.get()
+            if command == "stop":
+                return
+            try:
+                self.results.send(self.step(argument) if command == "step" else self.answer(command, argument))
+            except Exception as error:
+                # The other workers may be waiting for this one, so the coordinator stops them all.
+                self.results.send(error)
+                return
+
+    def exchange(self, batches):
+        """Send every other worker its batch and yield the items of the batches sent to this worker."""
+        for number, (inbox, batch) in enumerate(zip(self.inboxes, batches)):
+            if number != self.number:
+                inbox.put(batch)
+        yield from batches[self.number]
+        for _ in range(self.workers - 1):
+            yield from self.inboxes[self.number].get()
+
+    def setup(self):
+        """Prepare the worker inside its process, before the first command."""
+
+    def step(self, argument):
+        """Run one step and return the reply to the coordinating process."""
+        raise NotImplementedError
+
+    def answer(self, command, argument):
+        """Return the reply to a command other than step and stop."""
+        raise ValueError(f"Unknown worker command '{command}'.")
+
+
+class BreadthFirstWorker(PartitionWorker):
+    """One worker process of a ParallelSearch, expanding its share of every layer.
+
+    All the workers share one SharedStateTable as their closed set, with one region per
+    worker. Children are sent to their owners, and each owner inserts the children it
+    receives into its own region with their depth and keeps the new ones as its share of
+    the next layer. A region is only ever written by its owner, so the table needs no
+    locks, and every state is stored once however many workers there are.
+    """
+
+    def __init__(self, board, number, commands, inboxes, results, table, start_key):
+        """Set up the worker state that is sent to the process; the process runs run()."""
+        super().__init__(board, number, commands, inboxes, results)
+        self.table = table
+        self.frontier = [start_key] if self.owns(start_key) else []
+
+    def step(self, depth):
+        """Expand the owned states of the layer at depth and collect the owned states of the next one.
+
+        Returns the number of states expanded, the size of the new owned frontier and the key
+        of a solved state found in the next layer, or None.
+        """
+        batches = [[] for _ in range(self.workers)]
+        solved_key = None
+        for key in self.frontier:
+            for move, new_state in self.board.successors(self.board.from_key(key)):
+                new_key = self.board.get_key(new_state)
+                batches[get_owner(new_key, self.workers)].append(new_key)
+                # The search stops at the first layer holding a solved state, so a solved child is new.
+                if solved_key is None and self.board.is_solved(new_state):
+                    solved_key = new_key
+        expanded_nodes = len(self.frontier)
+
+        self.frontier = [new_key for new_key in self.exchange(batches) if self.table.insert(new_key, depth + 1, self.number)]
+        return expanded_nodes, len(self.frontier), solved_key
+
+
+class AStarWorker(PartitionWorker):
+    """One worker process of a DistributedAStar, running A* on the states it owns.
+
+    The worker has its own open list (a util.BucketQueue keyed by f-value) and the cheapest
+    known cost of every state it owns. Each round it expands up to round_size of its best
+    nodes whose f-value is below the incumbent, the cost of the best solution known so far,
+    and exchanges the children with the other workers like PartitionWorker. The sender
+    computes a child's heuristic, since it holds the parent needed for incremental updates.
+    The heuristic is looked up by name in the worker process, as some heuristics (such as a
+    pattern database, which holds an mmap) cannot be sent to it. The worker also keeps the
+    parent key and move of every state it owns, which it answers "parent" commands with.
+    """
+
+    def __init__(self, board, number, commands, inboxes, results, start_key, heuristic_name, pattern_directory, round_size):
+        """Set up the worker state that is sent to the process; the process runs run()."""
+        super().__init__(board, number, commands, inboxes, results)
+        self.start_key = start_key
+        self.heuristic_name = heuristic_name
+        self.pattern_directory = pattern_directory
+        self.heuristic = None
+        self.round_size = round_size
+        self.open = util.BucketQueue()
+        self.best_costs = {}
+        self.parents = {}
+
+    def setup(self):
+        """Look up the heuristic and open the start state if this worker owns it."""
+        # board_solver imports this module, so it can only be imported once both are loaded.
+        from controllers.board_solver import resolve_heuristic
+
+        self.heuristic = resolve_heuristic(self.board, self.heuristic_name, self.pattern_directory)
+        if self.owns(self.start_key):
+            value = self.heuristic(self.board.from_key(self.start_key), self.board)
+            self.best_costs[self.start_key] = 0
+            self.parents[self.start_key] = (None, None)
+            self.open.push((self.start_key, 0, value), value, 0)
+
+    def step(self, incumbent):
+        """Run one round of A* below the incumbent cost.
+
+        Returns the number of states expanded, the lowest f-value left in the open list (None
+        if it is empty) and the (cost, key) of the cheapest solved state received, or None.
+        """
+        batches = [[] for _ in range(self.workers)]
+        expanded_nodes = 0
+        solved = False
+        # A round ends early once it generates a solution, so the next one can prune with it.
+        while expanded_nodes < self.round_size and not solved and not self.open.isEmpty() and self.open.minimum < incumbent:
+            key, cost, value = self.open.pop()
+            if cost > self.best_costs[key]:
+                continue
+            expanded_nodes += 1
+            state = self.board.from_key(key)
+            for move, new_state in self.board.successors(state):
+                new_key = self.board.get_key(new_state)
+                new_value = self.heuristic(new_state, self.board, (state, value, move))
+                solved = solved or self.board.is_solved(new_state)
+                batches[get_owner(new_key, self.workers)].append((new_key, cost + 1, new_value, key, move))
+
+        solution = None
+        for new_key, cost, value, key, move in self.exchange(batches):
+            if new_key in self.best_costs and self.best_costs[new_key] <= cost:
+                continue
+            self.best_costs[new_key] = cost
+            self.parents[new_key] = (key, move)
+            if self.board.is_solved(self.board.from_key(new_key)):
+                if solution is None or cost < solution[0]:
+                    solution = (cost, new_key)
+            else:
+                self.open.push((new_key, cost, value), cost + value, cost)
+        return expanded_nodes, self.open.minimum, solution
+
+    def answer(self, command, argument):
+        """Return the (parent key, move) of the owned state key sent with a "parent" command."""
+        if command == "parent":
+            return self.parents[argument]
+        return super().answer(command, argument)
+
+
+class ParallelSearch:
+    """Breadth first search with each layer partitioned across worker processes by key hash.
+
+    Every state has one owner (see get_owner) that expands it, and the workers share a
+    SharedStateTable holding every state reached with its depth (see BreadthFirstWorker).
+    The coordinating process starts the layers and stops at the first one holding a solved
+    state, which is therefore at the optimal depth. The path is rebuilt from the table by
+    stepping back to a neighbour stored one layer earlier, as in BatchedSearch.
+    """
+
+    def __init__(self, board, workers=None, table_size=1 << 22):
+        """Prepare a search of a BitBoard on the given number of processes (one per CPU by default).
+
+        table_size is the number of states the shared visited table can hold.
+        """
+        self.board = board
+        self.workers = workers or os.cpu_count()
+        self.table_size = table_size
+        self.expanded_nodes = 0
+        self.commands = []
+        self.inboxes = []
+        self.results = []
+        self.processes = []
+        self.failed = False
+
+    def start(self, worker_class, *arguments):
+        """Start one process per worker, each running a worker_class built with the extra arguments."""
+        # The queues and pipes are kept here, as the processes may still be unpickling them
+        # after start returns when they are spawned rather than forked.
+        self.commands = [multiprocessing.Queue() for _ in range(self.workers)]
+        self.inboxes = [multiprocessing.Queue() for _ in range(self.workers)]
+        pipes = [multiprocessing.Pipe(duplex=False) for _ in range(self.workers)]
+        self.results = [receiver for receiver, sender in pipes]
+        self.failed = False
+        self.processes = [
+            multiprocessing.Process(
+                target=worker_class(self.board, number, self.commands[number], self.inboxes, pipes[number][1], *arguments).run, daemon=True
+            )
+            for number in range(self.workers)
+        ]
+        for process in self.processes:
+            process.start()
+
+    def step(self, argument=None):
+        """Have every worker run one step and return their replies in worker order."""
+        for queue in self.commands:
+            queue.put(("step", argument))
+        replies = self.receive(range(self.workers))
+        return [replies[number] for number in range(self.workers)]
+
+    def receive(self, numbers):
+        """Wait for one reply from each of the numbered workers and return them by worker number.
+
+        An exception raised by a worker is raised again here, and a worker process that
+        exits without replying (killed, for instance) raises a RuntimeError.
+        """
+        replies = {}
+        while len(replies) < len(numbers):
+            pending = [number for number in numbers if number not in replies]
+            ready = connection.wait([self.results[number] for number in pending] + [self.processes[number].sentinel for number in pending])
+            for number in pending:
+                try:
+                    if self.results[number].poll():
+                        replies[number] = self.results[number].recv()
+                        if isinstance(replies[number], Exception):
+                            self.failed = True
+                            raise replies[number]
+                        continue
+                except EOFError:
+                    pass
+                else:
+                    if self.processes[number].sentinel not in ready:
+                        continue
+                # The worker closed its end of the pipe or exited without replying.
+                self.failed = True
+                self.processes[number].join()
+                raise RuntimeError(f"Search worker {number} exited with code {self.processes[number].exitcode}.")
+        return replies
+
+    def stop(self):
+        """Stop the worker processes and wait for them to exit."""
+        for process, queue in zip(self.processes, self.commands):
+            if self.failed:
+                process.terminate()
+            else:
+                queue.put(("stop", None))
+        for process in self.processes:
+            process.join()
+        for receiver in self.results:
+            receiver.close()
+
+    def search(self, state):
+        """Return an optimal list of (vehicle index, direction, distance) moves from a state, or None."""
+        if self.board.is_solved(state):
+            return []
+
+        start_key = self.board.get_key(state)
+        table = SharedStateTable(self.board.key_bits, self.table_size, self.workers)
+        try:
+            table.insert(start_key, 0, get_owner(start_key, self.workers))
+            self.start(BreadthFirstWorker, table, start_key)
+            try:
+                depth = 0
+                while True:
+                    replies = self.step(depth)
+                    depth += 1
+                    self.expanded_nodes += sum(expanded_nodes for expanded_nodes, frontier_size, solved_key in replies)
+                    solved_keys = [solved_key for expanded_nodes, frontier_size, solved_key in replies if solved_key is not None]
+                    if solved_keys:
+                        return self.get_path(table, solved_keys[0], depth)
+                    if not any(frontier_size for expanded_nodes, frontier_size, solved_key in replies):
+                        return None
+            finally:
+                self.stop()
+        finally:
+            table.close()
+            table.unlink()
+
+    def get_path(self, table, key, depth):
+        """Walk back from a key at the given depth to the start through states stored one layer earlier."""
+        path = []
+        state = self.board.from_key(key)
+        for depth in range(depth - 1, -1, -1):
+            for move, parent in self.board.successors(state):
+                parent_key = self.board.get_key(parent)
+                if table.get_depth(parent_key, get_owner(parent_key, self.workers)) == depth:
+                    path.append(self.board.inverse_move(move))
+                    state = parent
+                    break
+        path.reverse()
+        return path
+
+
+class DistributedAStar(ParallelSearch):
+    """A* with the states partitioned across worker processes by key hash (see AStarWorker).
+
+    The workers run in bulk synchronous rounds. After every round the coordinating process
+    lowers the incumbent to the cheapest solution found so far and stops once no open list
+    holds a node with an f-value below it. With an admissible heuristic every node on a
+    cheaper solution path would have such an f-value, so the incumbent is then optimal.
+    """
+
+    def __init__(self, board, heuristic_name, workers=None, round_size=256, pattern_directory=PatternDatabase.DIRECTORY):
+        """Prepare a search of a BitBoard with a heuristic named as in board_solver.
+
+        Each worker expands at most round_size nodes per round, and a pattern database is
+        read from pattern_directory.
+        """
+        super().__init__(board, workers)
+        self.heuristic_name = heuristic_name
+        self.round_size = round_size
+        self.pattern_directory = pattern_directory
+
+    def search(self, state):
+        """Return an optimal list of (vehicle index, direction, distance) moves from a state, or None."""
+        if self.board.is_solved(state):
+            return []
+
+        self.start(AStarWorker, self.board.get_key(state), self.heuristic_name, self.pattern_directory, self.round_size)
+        try:
+            incumbent = (float("inf"), None)
+            while True:
+                replies = self.step(incumbent[0])
+                self.expanded_nodes += sum(expanded_nodes for expanded_nodes, minimum, solution in replies)
+                incumbent = min([incumbent] + [solution for expanded_nodes, minimum, solution in replies if solution is not None])
+                minimums = [minimum for expanded_nodes, minimum, solution in replies if minimum is not None]
+                if not minimums or min(minimums) >= incumbent[0]:
+                    return None if incumbent[1] is None else self.get_owned_path(incumbent[1])
+        finally:
+            self.stop()
+
+    def get_owned_path(self, key):
+        """Rebuild the moves leading to a key by asking each state's owner for its parent."""
+        path = []
+        while True:
+            owner = get_owner(key, self.workers)
+            self.commands[owner].put(("parent", key))
+            key, move = self.receive([owner])[owner]
+            if key is None:
+                break
+            path.append(move)
+        path.reverse()
+        return path
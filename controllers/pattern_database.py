@@ -0,0 +1,98 @@
+import hashlib
+import mmap
+import os
+
+
+class PatternDatabase:
+    """Exact solution lengths of a simplified board, used as an admissible heuristic.
+
+    The simplified board keeps only the main vehicle, the vehicles whose lanes cross its
+    lane and the broken-down vehicles, which never move anyway. Removing vehicles can only
+    make the puzzle easier, so the exact distance of the simplified position never
+    overestimates the real one. The distances of every simplified position are found once
+    by breadth first search backward from all simplified goal positions and stored as a
+    flat file of bytes, one per position, which is then read through mmap. The file is
+    named after the simplified layout, so every board sharing it reuses the table.
+    """
+
+    DIRECTORY = "./pattern_databases"
+    UNSOLVABLE = 255
+
+    def __init__(self, board, directory=DIRECTORY):
+        """Open the table for a BitBoard's layout, building it first if no run has stored it yet."""
+        self.board = board
+        main_lane = self.get_lane_mask(board.main_index)
+        self.pattern = [index for index in board.movable if index == board.main_index or self.get_lane_mask(index) & main_lane]
+        self.pattern_indexes = set(self.pattern)
+        self.obstacles = [index for index in range(len(board.vehicles)) if index not in board.movable]
+
+        # Positions are numbered in a mixed radix system with one digit per pattern vehicle offset.
+        self.radixes = []
+        self.size = 1
+        for index in self.pattern:
+            self.radixes.append(self.size)
+            self.size *= board.max_offsets[index] + 1
+
+        self.path = os.path.join(directory, f"{self.get_layout_key()}.pdb")
+        if not os.path.exists(self.path):
+            self.build()
+        with open(self.path, "rb") as file:
+            self.table = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def get_lane_mask(self, index):
+        """Return every cell a vehicle can ever cover."""
+        return sum(1 << cell for cell in self.board.lane_cells[index])
+
+    def get_layout_key(self):
+        """Identify the simplified puzzle by board size, move model and the lanes of the vehicles kept."""
+        board = self.board
+        lanes = [
+            (board.lane_cells[index][0], board.orientations[index].value, board.lengths[index], index == board.main_index)
+            for index in self.pattern
+        ]
+        obstacles = [board.get_body_mask(board.get_initial_state(), index) for index in self.obstacles]
+        layout = (board.width, board.height, board.move_model.value, lanes, obstacles)
+        return hashlib.sha1(repr(layout).encode()).hexdigest()
+
+    def get_index(self, state):
+        """Return the table position of a state's simplified position."""
+        return sum(self.board.get_offset(state, index) * radix for index, radix in zip(self.pattern, self.radixes))
+
+    def build(self):
+        """Compute the distance of every simplified position and write the table file."""
+        distances = bytearray([self.UNSOLVABLE]) * self.size
+        frontier = list(self.board.goal_states(self.pattern + self.obstacles))
+        for state in frontier:
+            distances[self.get_index(state)] = 0
+
+        depth = 0
+        while frontier:
+            depth += 1
+            layer = []
+            for state in frontier:
+                for move, new_state in self.board.successors(state, self.pattern):
+                    index = self.get_index(new_state)
+                    if distances[index] == self.UNSOLVABLE:
+                        # Capping long distances keeps them a lower bound.
+                        distances[index] = min(depth, self.UNSOLVABLE - 1)
+                        layer.append(new_state)
+            frontier = layer
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temporary_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as file:
+            file.write(distances)
+        os.replace(temporary_path, self.path)
+
+    def lookup(self, state):
+        """Return the stored distance of a state's simplified position."""
+        return self.table[self.get_index(state)]
+
+    def heuristic(self, state, board, parent=None):
+        """Heuristic function with the signature of the ones in board_solver."""
+        if parent is not None:
+            parent_state, value, move = parent
+            if move[0] not in self.pattern_indexes:
+                return value
+
+        return self.lookup(state)
@@ -0,0 +1,132 @@
+import json
+import multiprocessing
+import time
+from datetime import datetime, timezone
+from multiprocessing import connection
+from controllers.board_solver import BoardSolver
+
+
+def run_configuration(game_board, move_model, number, algorithm, heuristic_name, results):
+    """Solve a board with one configuration and send (number, path, expanded nodes, seconds) through the results pipe.
+
+    The path holds (vehicle index, direction, distance) moves; an exception takes its place on failure.
+    """
+    start_time = time.perf_counter()
+    try:
+        solver = BoardSolver(game_board, move_model)
+        moves = solver.solve(algorithm, heuristic_name)
+        path = None
+        if moves is not None:
+            path = [(solver.board.index_of(vehicle.get_name()), direction, distance) for vehicle, direction, distance in moves]
+        results.send((number, path, solver.expanded_nodes, time.perf_counter() - start_time))
+    except Exception as error:
+        results.send((number, error, None, None))
+
+
+class Portfolio:
+    """Race several algorithm and heuristic configurations on one board and keep the first answer.
+
+    Every configuration runs in its own process. All of them return optimal solutions, so
+    the first one to finish answers the board and the others are terminated. Each race is
+    appended as one JSON line to a log, recording the board, its size and vehicle count and
+    the configuration that won, to learn which configurations suit which kinds of board.
+    """
+
+    CONFIGURATIONS = (
+        ("bfs", None),
+        ("a_star", "blockingHeuristic"),
+        ("a_star", "distancePlusBlockingHeuristic"),
+        ("a_star", "recursiveBlockingHeuristic"),
+        ("a_star", "patternDatabaseHeuristic"),
+    )
+    LOG_PATH = "./portfolio_log.jsonl"
+
+    def __init__(self, solver, configurations=CONFIGURATIONS, log_path=LOG_PATH):
+        """Prepare a race for the board of a BoardSolver; a log_path of None disables the log."""
+        self.solver = solver
+        self.configurations = configurations
+        self.log_path = log_path
+        self.winner = None
+        self.time_delta = None
+
+    def solve(self):
+        """Return the moves found by the first configuration to finish, or None if the board cannot be solved.
+
+        The winning (algorithm, heuristic) pair is kept in self.winner and its expanded nodes
+        are added to the solver's. A configuration whose process dies without answering (killed
+        for running out of memory, for instance) fails like one that raises. If every
+        configuration fails, the first error is raised.
+        """
+        pipes = [multiprocessing.Pipe(duplex=False) for _ in self.configurations]
+        receivers = [receiver for receiver, sender in pipes]
+        processes = [
+            multiprocessing.Process(
+                target=run_configuration,
+                args=(self.solver.game_board, self.solver.move_model, number, algorithm, heuristic_name, pipes[number][1]),
+                daemon=True,
+            )
+            for number, (algorithm, heuristic_name) in enumerate(self.configurations)
+        ]
+        for process in processes:
+            process.start()
+
+        errors = []
+        pending = list(range(len(processes)))
+        answer = None
+        try:
+            while answer is None:
+                ready = connection.wait([receivers[number] for number in pending] + [processes[number].sentinel for number in pending])
+                for number in [number for number in pending if receivers[number] in ready or processes[number].sentinel in ready]:
+                    pending.remove(number)
+                    try:
+                        reply = receivers[number].recv() if receivers[number].poll() else None
+                    except EOFError:
+                        reply = None
+                    if reply is None:
+                        processes[number].join()
+                        exit_code = processes[number].exitcode
+                        errors.append(RuntimeError(f"Configuration {self.configurations[number]} exited with code {exit_code}."))
+                    elif isinstance(reply[1], Exception):
+                        errors.append(reply[1])
+                    else:
+                        answer = reply
+                        break
+                if answer is None and len(errors) == len(processes):
+                    raise errors[0]
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.join()
+            for receiver in receivers:
+                receiver.close()
+
+        number, path, expanded_nodes, time_delta = answer
+        self.winner = self.configurations[number]
+        self.time_delta = time_delta
+        self.solver.expanded_nodes += expanded_nodes
+        self.log(path, expanded_nodes)
+        return None if path is None else self.solver.to_moves(path)
+
+    def log(self, path, expanded_nodes):
+        """Append the result of the race to the log."""
+        if self.log_path is None:
+            return
+        board = self.solver.board
+        algorithm, heuristic_name = self.winner
+        record = {
+            "time": datetime.now(timezone.utc).isoformat(),
+            "board": board.get_board_text(board.get_initial_state(), canonical=True),
+            "width": board.width,
+            "height": board.height,
+            "vehicles": len(board.vehicles),
+            "move_model": board.move_model.value,
+            "configurations": [list(configuration) for configuration in self.configurations],
+            "algorithm": algorithm,
+            "heuristic": heuristic_name,
+            "seconds": self.time_delta,
+            "expanded_nodes": expanded_nodes,
+            "moves": None if path is None else len(path),
+        }
+        with open(self.log_path, "a") as file:
+            file.write(json.dumps(record) + "\n")
@@ -0,0 +1,75 @@
+from multiprocessing import shared_memory
+
+MASK = (1 << 64) - 1
+
+
+def mix(key, multiplier):
+    """Return 32 well mixed bits of a state key, the same in every process."""
+    # hash folds every bit of a long key into 61 bits, and the multiplication carries them
+    # into the high bits kept; different multipliers give independent values.
+    return ((hash(key) * multiplier) & MASK) >> 32
+
+
+class SharedStateTable:
+    """Fixed-capacity hash set of state keys in shared memory, usable from several processes.
+
+    The table is one block of multiprocessing.shared_memory holding capacity fixed-width
+    slots, split into regions of equal size. A key lives in one region, chosen by the
+    caller, and is found there by open addressing with linear probing. A slot stores key + 1
+    (so an all zero slot is empty) followed by the depth at which the state was first
+    reached, which is enough to rebuild a path one layer at a time. Each region has a single
+    writer, the worker owning its keys, so no locks are taken: other processes may only read
+    a region while its writer is idle. Every state is stored once per machine, and the
+    capacity can be chosen to fit the memory available.
+    """
+
+    DEPTH_BYTES = 2
+
+    def __init__(self, key_bits, capacity, regions=1):
+        """Allocate an empty table for keys of key_bits bits; close() and unlink() free it."""
+        self.key_size = key_bits // 8 + 1
+        self.record_size = self.key_size + self.DEPTH_BYTES
+        self.region_capacity = max(1, capacity // regions)
+        self.capacity = self.region_capacity * regions
+        # New shared memory is zero-filled, so every slot starts empty.
+        self.memory = shared_memory.SharedMemory(create=True, size=self.capacity * self.record_size)
+
+    def get_slot(self, key):
+        """Return the first slot probed for a key, counted from the start of its region."""
+        return mix(key, 0xC2B2AE3D27D4EB4F) % self.region_capacity
+
+    def probe(self, key, depth=None, region=0):
+        """Return (True, stored depth) if a key is stored; otherwise store it with depth, if given, and return (False, depth)."""
+        record = (key + 1).to_bytes(self.key_size, "little")
+        buffer = self.memory.buf
+        first = region * self.region_capacity
+        slot = self.get_slot(key)
+        for _ in range(self.region_capacity):
+            start = (first + slot) * self.record_size
+            found = bytes(buffer[start : start + self.key_size])
+            if found == record:
+                return True, int.from_bytes(buffer[start + self.key_size : start + self.record_size], "little")
+            if not any(found):
+                if depth is not None:
+                    buffer[start : start + self.record_size] = record + depth.to_bytes(self.DEPTH_BYTES, "little")
+                return False, depth
+            slot = (slot + 1) % self.region_capacity
+        if depth is None:
+            return False, None
+        raise MemoryError("The shared state table is full; give it a larger capacity.")
+
+    def insert(self, key, depth, region=0):
+        """Store a key with the depth it was reached at and return True, or return False if it was already stored."""
+        return not self.probe(key, depth, region)[0]
+
+    def get_depth(self, key, region=0):
+        """Return the depth stored with a key, or None if it is not stored."""
+        return self.probe(key, None, region)[1]
+
+    def close(self):
+        """Detach this process from the table."""
+        self.memory.close()
+
+    def unlink(self):
+        """Free the table's memory once every process has closed it."""
+        self.memory.unlink()
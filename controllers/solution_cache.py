@@ -0,0 +1,93 @@
+import json
+import sqlite3
+from collections import OrderedDict
+from util import Direction
+
+
+class SolutionCache:
+    """Solutions stored on disk in SQLite, with the most recently used ones kept in memory.
+
+    Entries are keyed by the board's canonical text and the move model, and record the
+    algorithm and heuristic that produced them. Every algorithm offered returns optimal
+    solutions, so an entry answers any later request for the same board and move model.
+    The text and the stored moves use canonical vehicle labels, so boards that differ only
+    in vehicle names share an entry and get the moves back under their own names.
+    """
+
+    PATH = "./solutions.db"
+
+    def __init__(self, path=PATH, capacity=1024):
+        """Open or create the cache database and an empty in-memory LRU of the given capacity."""
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS solutions ("
+            "board TEXT NOT NULL, move_model TEXT NOT NULL, algorithm TEXT NOT NULL, heuristic TEXT, "
+            "moves TEXT, expanded_nodes INTEGER, PRIMARY KEY (board, move_model))"
+        )
+        self.connection.commit()
+
+    @staticmethod
+    def get_key(board):
+        """Return the canonical (board text, move model) key of a BitBoard's initial position."""
+        return board.get_board_text(board.get_initial_state(), canonical=True), board.move_model.value
+
+    def get(self, board):
+        """Return the cached entry for a BitBoard's initial position, or None.
+
+        The entry is a dict with the moves, as (vehicle, direction, distance) triples or None
+        for an unsolvable board, and the algorithm, heuristic and expanded nodes that produced them.
+        """
+        key = self.get_key(board)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        else:
+            row = self.connection.execute(
+                "SELECT algorithm, heuristic, moves, expanded_nodes FROM solutions WHERE board = ? AND move_model = ?", key
+            ).fetchone()
+            if row is None:
+                return None
+            algorithm, heuristic, moves, expanded_nodes = row
+            entry = {
+                "algorithm": algorithm,
+                "heuristic": heuristic,
+                "moves": None if moves is None else json.loads(moves),
+                "expanded_nodes": expanded_nodes,
+            }
+            self.remember(key, entry)
+
+        moves = entry["moves"]
+        if moves is not None:
+            moves = [
+                (board.get_vehicle(board.canonical_indexes[name]), Direction(direction), distance) for name, direction, distance in moves
+            ]
+        return dict(entry, moves=moves, move_model=key[1])
+
+    def put(self, board, moves, algorithm, heuristic=None, expanded_nodes=None):
+        """Store the (vehicle, direction, distance) moves found for a BitBoard's initial position."""
+        key = self.get_key(board)
+        if moves is not None:
+            moves = [
+                (board.canonical_names[board.index_of(vehicle.get_name())], direction.value, distance)
+                for vehicle, direction, distance in moves
+            ]
+        entry = {"algorithm": algorithm, "heuristic": heuristic, "moves": moves, "expanded_nodes": expanded_nodes}
+        self.connection.execute(
+            "INSERT OR REPLACE INTO solutions (board, move_model, algorithm, heuristic, moves, expanded_nodes) VALUES (?, ?, ?, ?, ?, ?)",
+            (*key, algorithm, heuristic, None if moves is None else json.dumps(moves), expanded_nodes),
+        )
+        self.connection.commit()
+        self.remember(key, entry)
+
+    def remember(self, key, entry):
+        """Keep an entry in memory, evicting the least recently used one when full."""
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def close(self):
+        """Close the database connection."""
+        self.connection.close()
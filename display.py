@@ -18,7 +18,7 @@ class GUIView:
             move_index (int, optional): The index of the current move. Defaults to None.
             total_moves (int, optional): The total number of moves in the solution. Defaults to None.
             possible_moves (list of tuples, optional): List of possible moves. Each move is a tuple
-                                                       containing vehicle information and direction. Defaults to None.
+                                                       containing vehicle information, direction and distance. Defaults to None.
         """
         ax.clear()
         ax.set_xlim(0, len(grid[0]))
@@ -39,22 +39,22 @@ class GUIView:
         # Draw arrows indicating possible moves
         if possible_moves:
             for state in possible_moves:
-                vehicle, direction = state[0][0]
+                vehicle, direction, distance = state[0][0]
                 orientation = vehicle.get_orientation()
                 x_start, y_start = vehicle.start.values()
                 x_end, y_end = vehicle.end.values()
 
                 if orientation == Orientation.HORIZONTAL:
                     if direction == Direction.FORWARD:
-                        arrow = patches.Arrow(x_end + 0.5, y_end + 0.5, 1, 0, facecolor="red", edgecolor="red")
+                        arrow = patches.Arrow(x_end + 0.5, y_end + 0.5, distance, 0, facecolor="red", edgecolor="red")
                     elif direction == Direction.BACKWARD:
-                        arrow = patches.Arrow(x_start + 0.5, y_start + 0.5, -1, 0, facecolor="red", edgecolor="red")
+                        arrow = patches.Arrow(x_start + 0.5, y_start + 0.5, -distance, 0, facecolor="red", edgecolor="red")
 
                 elif orientation == Orientation.VERTICAL:
                     if direction == Direction.FORWARD:
-                        arrow = patches.Arrow(x_end + 0.5, y_end + 0.5, 0, 1, facecolor="red", edgecolor="red")
+                        arrow = patches.Arrow(x_end + 0.5, y_end + 0.5, 0, distance, facecolor="red", edgecolor="red")
                     elif direction == Direction.BACKWARD:
-                        arrow = patches.Arrow(x_start + 0.5, y_start + 0.5, 0, -1, facecolor="red", edgecolor="red")
+                        arrow = patches.Arrow(x_start + 0.5, y_start + 0.5, 0, -distance, facecolor="red", edgecolor="red")
 
                 ax.add_patch(arrow)
 
@@ -93,19 +93,71 @@ class GUIView:
         plt.show()
         plt.clf()
 
-    def show_statistics(self, time_delta, expanded_nodes, num_moves="--"):
+    def show_statistics(self, time_delta, expanded_nodes, num_moves="--", num_steps="--", num_slides="--"):
         """Display statistical information after the solution is computed.
 
         Args:
             time_delta (float): Time taken to compute the solution.
             expanded_nodes (int): Number of nodes expanded during the search.
             num_moves (int or str, optional): Number of moves in the solution. Defaults to "--".
+            num_steps (int or str, optional): Solution length counting every cell moved. Defaults to "--".
+            num_slides (int or str, optional): Solution length counting every slide of a vehicle once. Defaults to "--".
         """
         print("\n\nStatistics:\n")
         print(f"Amount of Moves: {num_moves}\n")
+        print(f"Step Metric: {num_steps}\n")
+        print(f"Slide Metric: {num_slides}\n")
         print(f"Time Passed: {time_delta:.3f} seconds\n")
         print(f"Expanded Nodes: {expanded_nodes}\n")
 
+    def show_hint(self, move, distance):
+        """Display the optimal next move and how many moves are left.
+
+        Args:
+            move (tuple or None): (vehicle, direction, distance) move, or None when there is nothing to do.
+            distance (int or None): Number of moves left, or None when the board cannot be solved.
+        """
+        if distance is None:
+            print("This puzzle is unsolvable.\n")
+        elif move is None:
+            print("The puzzle is already solved.\n")
+        else:
+            vehicle, direction, cells = move
+            print(f"Next Move: {vehicle.get_name()} {direction.value.lower()} {cells}\n")
+            print(f"Moves Left: {distance}\n")
+
+    def show_winner(self, algorithm, heuristic_name, time_delta):
+        """Show which configuration of a portfolio race answered first.
+
+        Args:
+            algorithm (str): The winning algorithm.
+            heuristic_name (str): The heuristic it used, or None.
+            time_delta (float): The seconds the winner took.
+        """
+        configuration = algorithm if heuristic_name is None else f"{algorithm} with {heuristic_name}"
+        print(f"\nPortfolio Winner: {configuration} ({time_delta:.3f} seconds)\n")
+
+    def show_cache_hit(self, algorithm, heuristic_name, expanded_nodes):
+        """Show that the solution was read from the solution cache and what had produced it.
+
+        Args:
+            algorithm (str): The algorithm that found the cached solution.
+            heuristic_name (str): The heuristic it used, or None.
+            expanded_nodes (int): The nodes it expanded, or None if they were not recorded.
+        """
+        configuration = algorithm if heuristic_name is None else f"{algorithm} with {heuristic_name}"
+        print(f"\nCached Solution: found by {configuration} after expanding {expanded_nodes} nodes\n")
+
+    def show_iterations(self, iterations):
+        """Display the threshold and expanded nodes of every iteration of an iterative search.
+
+        Args:
+            iterations (list of tuples): (threshold, expanded nodes) pairs in search order.
+        """
+        print(f"Iterations: {len(iterations)}\n")
+        for threshold, expanded_nodes in iterations:
+            print(f"Threshold {threshold}: {expanded_nodes} expanded nodes")
+
 
 class ConsoleView(object):
 
@@ -136,14 +188,43 @@ class ConsoleView(object):
                     self.stdscr.addstr("\n")
         self.stdscr.refresh()
 
-    def show_statistics(self, time_delta, expanded_nodes, amount_moves="--"):
+    def show_statistics(self, time_delta, expanded_nodes, num_moves="--", num_steps="--", num_slides="--"):
         print("\n")
         print("\n")
         print("Statistics: \n")
-        print("Amount of Moves: %s \n" % amount_moves)
+        print("Amount of Moves: %s \n" % num_moves)
+        print("Step Metric: %s \n" % num_steps)
+        print("Slide Metric: %s \n" % num_slides)
         print("Time Passed: %.3f seconds\n" % time_delta)
         print("Expanded Nodes: %s\n" % expanded_nodes)
 
+    def show_hint(self, move, distance):
+        """Display the optimal next move and how many moves are left."""
+        if distance is None:
+            print("This puzzle is unsolvable.\n")
+        elif move is None:
+            print("The puzzle is already solved.\n")
+        else:
+            vehicle, direction, cells = move
+            print("Next Move: %s %s %d\n" % (vehicle.get_name(), direction.value.lower(), cells))
+            print("Moves Left: %s\n" % distance)
+
+    def show_iterations(self, iterations):
+        """Display the threshold and expanded nodes of every iteration of an iterative search."""
+        print("Iterations: %d\n" % len(iterations))
+        for threshold, expanded_nodes in iterations:
+            print("Threshold %s: %s expanded nodes" % (threshold, expanded_nodes))
+
+    def show_winner(self, algorithm, heuristic_name, time_delta):
+        """Show which configuration of a portfolio race answered first."""
+        configuration = algorithm if heuristic_name is None else "%s with %s" % (algorithm, heuristic_name)
+        print("\nPortfolio Winner: %s (%.3f seconds)\n" % (configuration, time_delta))
+
+    def show_cache_hit(self, algorithm, heuristic_name, expanded_nodes):
+        """Show that the solution was read from the solution cache and what had produced it."""
+        configuration = algorithm if heuristic_name is None else "%s with %s" % (algorithm, heuristic_name)
+        print("\nCached Solution: found by %s after expanding %s nodes\n" % (configuration, expanded_nodes))
+
     def display_solution(self, solution):
         """Display the moves to solve the puzzle."""
         print("\n")
@@ -166,6 +247,7 @@ class ConsoleView(object):
                 for column_index, move in enumerate(solution[i] for i in collection):
                     vehicle = move[0]
                     direction = move[1]
+                    distance = move[2]
                     direction_name = ""
                     if vehicle.get_orientation() == Orientation.HORIZONTAL and direction == Direction.FORWARD:
                         direction_name = "Right"
@@ -179,7 +261,7 @@ class ConsoleView(object):
                     if vehicle.get_orientation() == Orientation.VERTICAL and direction == Direction.BACKWARD:
                         direction_name = "Up"
 
-                    display_text = "%02d: %s -> %s " % (collection[column_index] + 1, vehicle.get_name(), direction_name)
+                    display_text = "%02d: %s -> %s x%d " % (collection[column_index] + 1, vehicle.get_name(), direction_name, distance)
                     print(display_text)
                     print(" " * (20 - len(display_text)))
 
@@ -1,8 +1,11 @@
 import time
 from controllers.board_loader import BoardLoader
 from controllers.board_solver import BoardSolver
+from controllers.portfolio import Portfolio
+from controllers.solution_cache import SolutionCache
 from display import ConsoleView, GUIView
 from optparse import OptionParser
+from util import MoveModel
 
 
 class RushHourGame:
@@ -14,6 +17,14 @@ class RushHourGame:
         self.display = GUIView() if options.display == "gui" else ConsoleView()
         self.algorithm = options.algorithm
         self.heuristic = options.heuristic
+        self.move_model = MoveModel(options.move_model)
+        self.hint = options.hint
+        self.memory_limit = options.memory_limit
+        self.workers = options.workers
+        self.table_size = options.table_size
+        self.portfolio_log = options.portfolio_log
+        self.winner = None
+        self.cache = SolutionCache(options.cache) if options.cache else None
 
     def run(self, board_file):
         """Execute the game solver and display the results."""
@@ -22,7 +33,11 @@ class RushHourGame:
 
         # Solve the game board using the selected algorithm
         start_time = time.perf_counter()
-        solver = BoardSolver(board)
+        solver = BoardSolver(board, self.move_model)
+        if self.hint:
+            move, distance = solver.hint(board.get_grid())
+            self.display.show_hint(move, distance)
+            return
         solution = self.solve_board(solver)
         end_time = time.perf_counter()
         time_delta = end_time - start_time
@@ -31,16 +46,31 @@ class RushHourGame:
         self.display_results(solver, solution, time_delta)
 
     def solve_board(self, solver):
+        """Solve the board from the solution cache, or with the selected algorithm on a miss."""
+        if self.cache is None:
+            return self.run_algorithm(solver)
+
+        entry = self.cache.get(solver.board)
+        if entry is not None:
+            # The statistics then cover the lookup, so the search that produced the entry is reported separately.
+            self.display.show_cache_hit(entry["algorithm"], entry["heuristic"], entry["expanded_nodes"])
+            return entry["moves"]
+        solution = self.run_algorithm(solver)
+        algorithm, heuristic = self.winner if self.algorithm == "portfolio" else (self.algorithm, self.heuristic)
+        if algorithm not in ("a_star", "parallel_a_star", "ida_star"):
+            heuristic = None
+        self.cache.put(solver.board, solution, algorithm, heuristic, solver.expanded_nodes)
+        return solution
+
+    def run_algorithm(self, solver):
         """Solve the board using the selected algorithm."""
-        match self.algorithm:
-            case "bfs":
-                return solver.get_solution_BFS()
-            case "dfs":
-                return solver.dfs_search()
-            case "a_star":
-                return solver.a_star_search(self.heuristic)
-            case _:
-                raise ValueError(f"Unknown algorithm: {self.algorithm}")
+        if self.algorithm == "portfolio":
+            portfolio = Portfolio(solver, log_path=self.portfolio_log)
+            solution = portfolio.solve()
+            self.winner = portfolio.winner
+            self.display.show_winner(*portfolio.winner, portfolio.time_delta)
+            return solution
+        return solver.solve(self.algorithm, self.heuristic, self.workers, self.memory_limit, self.table_size)
 
     def display_results(self, solver, solution, time_delta):
         """Display the solution and statistics."""
@@ -48,10 +78,14 @@ class RushHourGame:
             grids = solver.from_moves_to_grids(solution)
             possible_moves = [solver.get_states(grid) for grid in grids]
             self.display.show_solution(solver.game_board, grids, possible_moves)
-            self.display.show_statistics(time_delta, solver.expanded_nodes, len(solution))
+            self.display.show_statistics(
+                time_delta, solver.expanded_nodes, len(solution), solver.count_steps(solution), solver.count_slides(solution)
+            )
         else:
             print("No solution found!")
             self.display.show_statistics(time_delta, solver.expanded_nodes)
+        if solver.iterations:
+            self.display.show_iterations(solver.iterations)
 
 
 def main():
@@ -61,12 +95,61 @@ def main():
     EXAMPLES:   python game.py
                 OR python game.py --board beginner --display gui --algorithm bfs --heuristic null_heuristic
                     - Starts the game with the beginner board, GUI display, BFS algorithm, and null heuristic.
+                OR python game.py --board advance --moves slide
+                    - Solves the advance board counting a slide over any number of free cells as one move.
+                OR python game.py --board expert --algorithm portfolio
+                    - Races BFS and A* with several heuristics and keeps the first answer.
     """
     parser = OptionParser(usage=usage_str)
     parser.add_option("-b", "--board", dest="board_file", default="advance", help="Board file name.")
     parser.add_option("-d", "--display", dest="display", default="gui", help="Display type (gui or console).")
-    parser.add_option("-f", "--algorithm", dest="algorithm", default="a_star", help="Search algorithm to use.")
-    parser.add_option("--heuristic", dest="heuristic", default="blockingHeuristic", help="Heuristic function for A*.")
+    parser.add_option(
+        "-f",
+        "--algorithm",
+        dest="algorithm",
+        default="a_star",
+        help="Search algorithm to use (bfs, batched_bfs, external_bfs, parallel_bfs, frontier, bidirectional, cluster, dfs, a_star, "
+        "parallel_a_star, ida_star or portfolio).",
+    )
+    parser.add_option(
+        "--heuristic",
+        dest="heuristic",
+        default="blockingHeuristic",
+        help="Heuristic function for the A* and IDA* algorithms (null_heuristic, blockingHeuristic, distance_from_the_exit_Heuristic, "
+        "distancePlusBlockingHeuristic, recursiveBlockingHeuristic or patternDatabaseHeuristic).",
+    )
+    parser.add_option("-m", "--moves", dest="move_model", default="step", help="Move model (step or slide).")
+    parser.add_option("--cache", dest="cache", default=SolutionCache.PATH, help="Solution cache database file.")
+    parser.add_option("--no-cache", dest="cache", action="store_const", const=None, help="Do not read or store cached solutions.")
+    parser.add_option(
+        "--memory-limit",
+        dest="memory_limit",
+        type="int",
+        default=1000000,
+        help="Most states external_bfs holds in memory before writing them to disk.",
+    )
+    parser.add_option(
+        "-w",
+        "--workers",
+        dest="workers",
+        type="int",
+        default=None,
+        help="Worker processes for parallel algorithms (one per CPU by default).",
+    )
+    parser.add_option(
+        "--table-size",
+        dest="table_size",
+        type="int",
+        default=1 << 22,
+        help="States the shared visited table of parallel_bfs can hold; size it to the memory available.",
+    )
+    parser.add_option(
+        "--portfolio-log",
+        dest="portfolio_log",
+        default=Portfolio.LOG_PATH,
+        help="File the portfolio algorithm appends the winning configuration to.",
+    )
+    parser.add_option("--hint", dest="hint", action="store_true", default=False, help="Only show the optimal next move.")
 
     (options, args) = parser.parse_args()
 
@@ -0,0 +1,385 @@
+import hashlib
+from string import ascii_lowercase, ascii_uppercase
+from models.vehicle import Vehicle
+from util import Direction, MoveModel, Orientation
+
+
+class BitBoard:
+    """Compact integer encoding of Rush Hour board states.
+
+    A state is a single immutable integer. The low ``height * width`` bits are the
+    occupancy mask (bit ``y * width + x`` is set when the cell is taken) and above
+    them every vehicle owns a small field holding its offset along its lane: the
+    x coordinate of its start for horizontal vehicles, the y coordinate for
+    vertical ones.
+
+    Moves are (vehicle index, direction, distance) triples. Under the step move model
+    the distance is always one; under the slide model a vehicle may travel any number
+    of free cells in one move.
+
+    Vehicles are indexed by lane and by their order within the lane, never by name.
+    Vehicles cannot leave their lane or pass each other in it, so this order is the same
+    for every position of a puzzle and for every relabelling of it: keys, layout keys and
+    the canonical names below depend only on where the vehicles are.
+    """
+
+    def __init__(self, game_board, move_model=MoveModel.STEP):
+        """Build the per-board tables from a loaded game board."""
+        self.move_model = move_model
+        self.height = game_board.get_height()
+        self.width = game_board.get_width()
+        self.cells = self.height * self.width
+        self.occupancy_mask = (1 << self.cells) - 1
+
+        self.vehicles = sorted(self.collect_vehicles(game_board.get_grid()), key=self.get_lane_order)
+        self.names = [vehicle.get_name() for vehicle in self.vehicles]
+        self.indexes = {name: index for index, name in enumerate(self.names)}
+        self.main_index = next(index for index, vehicle in enumerate(self.vehicles) if vehicle.is_main_vehicle())
+
+        # Canonical labels: X for the main vehicle, then capitals and lowercase letters in index order.
+        capitals = iter(letter for letter in ascii_uppercase if letter != "X")
+        lowercase = iter(ascii_lowercase)
+        self.canonical_names = [
+            "X" if vehicle.is_main_vehicle() else next(lowercase) if vehicle.type == "broken_down" else next(capitals)
+            for vehicle in self.vehicles
+        ]
+        self.canonical_indexes = {name: index for index, name in enumerate(self.canonical_names)}
+
+        self.field_bits = max(self.width, self.height).bit_length()
+        self.field_mask = (1 << self.field_bits) - 1
+
+        self.orientations = []
+        self.lengths = []
+        self.steps = []
+        self.origins = []
+        self.max_offsets = []
+        self.shifts = []
+        self.lane_cells = []
+        self.body_masks = []
+        self.forward_masks = []
+        self.backward_masks = []
+        for index, vehicle in enumerate(self.vehicles):
+            start = vehicle.get_start_location()
+            end = vehicle.get_end_location()
+            orientation = vehicle.get_orientation()
+            if orientation == Orientation.HORIZONTAL:
+                length = end["x"] - start["x"] + 1
+                step = 1
+                origin = start["y"] * self.width
+                max_offset = self.width - length
+            else:
+                length = end["y"] - start["y"] + 1
+                step = self.width
+                origin = start["x"]
+                max_offset = self.height - length
+
+            # Every lane runs across the whole row or column, so offsets span 0..max_offset.
+            lane = [origin + i * step for i in range(max_offset + length)]
+            bodies = [sum(1 << cell for cell in lane[offset:offset + length]) for offset in range(max_offset + 1)]
+
+            self.orientations.append(orientation)
+            self.lengths.append(length)
+            self.steps.append(step)
+            self.origins.append(origin)
+            self.max_offsets.append(max_offset)
+            self.shifts.append(self.cells + index * self.field_bits)
+            self.lane_cells.append(lane)
+            self.body_masks.append(bodies)
+            # Cell entered by a one step move from each offset, or None at the end of the lane.
+            self.forward_masks.append([1 << lane[offset + length] if offset < max_offset else None for offset in range(max_offset + 1)])
+            self.backward_masks.append([1 << lane[offset - 1] if offset > 0 else None for offset in range(max_offset + 1)])
+
+        self.movable = tuple(index for index, vehicle in enumerate(self.vehicles) if vehicle.type != "broken_down")
+
+        # Cells to the right of the main vehicle's front, for every offset of the main vehicle.
+        main = self.main_index
+        front = self.lengths[main] - 1
+        self.exit_path_masks = []
+        for offset in range(self.max_offsets[main] + 1):
+            row, column = divmod(self.lane_cells[main][offset + front], self.width)
+            self.exit_path_masks.append(sum(1 << (row * self.width + next_column) for next_column in range(column + 1, self.width)))
+        exit_area = 0
+        for mask in self.exit_path_masks:
+            exit_area |= mask
+        self.crosses_exit_path = [
+            index != main and any(body & exit_area for body in bodies) for index, bodies in enumerate(self.body_masks)
+        ]
+        self.key_bits = len(self.vehicles) * self.field_bits
+        self.initial_state = self.encode(self.vehicle_offsets(self.vehicles))
+
+    def get_lane_order(self, vehicle):
+        """Return the sort key placing a vehicle by lane, then by position within the lane."""
+        start = vehicle.get_start_location()
+        if vehicle.get_orientation() == Orientation.HORIZONTAL:
+            return 0, start["y"] * self.width, start["x"]
+        return 1, start["x"], start["y"]
+
+    @staticmethod
+    def collect_vehicles(grid):
+        """Return the distinct vehicles placed on a grid, ordered by name."""
+        vehicles = {}
+        for column in grid:
+            for vehicle in column:
+                if vehicle:
+                    vehicles[vehicle.get_name()] = vehicle
+        return [vehicles[name] for name in sorted(vehicles)]
+
+    def vehicle_offsets(self, vehicles):
+        """Return the lane offsets of the given vehicles in board order."""
+        offsets = [0] * len(self.vehicles)
+        for vehicle in vehicles:
+            index = self.indexes[vehicle.get_name()]
+            start = vehicle.get_start_location()
+            offsets[index] = start["x"] if self.orientations[index] == Orientation.HORIZONTAL else start["y"]
+        return offsets
+
+    def encode(self, offsets):
+        """Pack a list of lane offsets into a state integer."""
+        state = 0
+        for index, offset in enumerate(offsets):
+            state |= self.body_masks[index][offset] | (offset << self.shifts[index])
+        return state
+
+    def get_key(self, state):
+        """Return the exact canonical key of a state.
+
+        The occupancy mask is fully determined by the vehicle offsets, so the key is
+        just the packed offset fields: equal keys mean equal boards and vice versa.
+        """
+        return state >> self.cells
+
+    def from_key(self, key):
+        """Rebuild the state that a key was taken from."""
+        return self.encode([(key >> (index * self.field_bits)) & self.field_mask for index in range(len(self.vehicles))])
+
+    def get_layout_key(self):
+        """Identify the board by its size, move model and vehicle lanes, but not their positions.
+
+        States of boards sharing a layout key are encoded the same way.
+        """
+        lanes = [
+            (self.lane_cells[index][0], self.orientations[index].value, self.lengths[index], self.vehicles[index].type)
+            for index in range(len(self.vehicles))
+        ]
+        obstacles = [self.get_body_mask(self.initial_state, index) for index in range(len(self.vehicles)) if index not in self.movable]
+        layout = (self.width, self.height, self.move_model.value, lanes, obstacles)
+        return hashlib.sha1(repr(layout).encode()).hexdigest()
+
+    def get_initial_state(self):
+        """Return the state of the loaded board."""
+        return self.initial_state
+
+    def get_offset(self, state, index):
+        """Return the lane offset of a vehicle in a state."""
+        return (state >> self.shifts[index]) & self.field_mask
+
+    def get_body_mask(self, state, index):
+        """Return the occupancy bits covered by a vehicle in a state."""
+        return self.body_masks[index][self.get_offset(state, index)]
+
+    def get_main_location(self, state):
+        """Return the (row, column) of the main vehicle's front cell."""
+        index = self.main_index
+        offset = self.get_offset(state, index)
+        if self.orientations[index] == Orientation.HORIZONTAL:
+            return self.origins[index] // self.width, offset + self.lengths[index] - 1
+        return offset + self.lengths[index] - 1, self.origins[index]
+
+    def get_exit_path_mask(self, state):
+        """Return the cells between the main vehicle's front and the right edge."""
+        return self.exit_path_masks[self.get_offset(state, self.main_index)]
+
+    def count_exit_path_blockers(self, state):
+        """Return how many cells between the main vehicle and the right edge are taken."""
+        return (state & self.get_exit_path_mask(state)).bit_count()
+
+    def exit_path_change(self, parent_state, state, index):
+        """Return how much moving one vehicle other than the main vehicle changed count_exit_path_blockers."""
+        if not self.crosses_exit_path[index]:
+            return 0
+        path = self.get_exit_path_mask(state)
+        return (self.get_body_mask(state, index) & path).bit_count() - (self.get_body_mask(parent_state, index) & path).bit_count()
+
+    def get_vehicles_on(self, state, mask):
+        """Return the indexes of the vehicles covering any of the given cells."""
+        return [index for index in range(len(self.vehicles)) if self.get_body_mask(state, index) & mask]
+
+    def get_clearing_moves(self, state, index, mask):
+        """Return the ways a vehicle can slide off the given cells along its lane.
+
+        For each direction, the nearest offset at which the vehicle no longer covers any of the
+        cells gives one (cells travelled, cells swept) pair, where the swept cells are the
+        ones that must be free for the vehicle to get there.
+        """
+        offset = self.get_offset(state, index)
+        bodies = self.body_masks[index]
+        moves = []
+        for step in (1, -1):
+            swept = 0
+            target = offset + step
+            while 0 <= target <= self.max_offsets[index]:
+                swept |= bodies[target]
+                if not bodies[target] & mask:
+                    moves.append((abs(target - offset), swept & ~bodies[offset]))
+                    break
+                target += step
+        return moves
+
+    def is_occupied(self, state, column, row):
+        """Check if a cell is taken by any vehicle."""
+        return bool(state >> (row * self.width + column) & 1)
+
+    def can_move(self, state, index, direction):
+        """Check if a vehicle can slide one cell in the given direction."""
+        offset = self.get_offset(state, index)
+        target = self.forward_masks[index][offset] if direction == Direction.FORWARD else self.backward_masks[index][offset]
+        return target is not None and not state & target
+
+    def apply_move(self, state, index, direction, distance=1):
+        """Return the state reached by sliding a vehicle the given number of cells."""
+        offset = self.get_offset(state, index)
+        bodies = self.body_masks[index]
+        if direction == Direction.FORWARD:
+            return (state ^ bodies[offset] ^ bodies[offset + distance]) + (distance << self.shifts[index])
+        return (state ^ bodies[offset] ^ bodies[offset - distance]) - (distance << self.shifts[index])
+
+    def successors(self, state, vehicles=None):
+        """Return the (move, state) pairs reachable in one move under the board's move model.
+
+        Only the given vehicle indexes are moved, all movable vehicles by default.
+        """
+        if self.move_model == MoveModel.SLIDE:
+            return self.slide_successors(state, vehicles)
+        return self.step_successors(state, vehicles)
+
+    def step_successors(self, state, vehicles=None):
+        """Return the (move, state) pairs reachable by sliding one vehicle one cell."""
+        states = []
+        field_mask = self.field_mask
+        for index in self.movable if vehicles is None else vehicles:
+            shift = self.shifts[index]
+            offset = (state >> shift) & field_mask
+            bodies = self.body_masks[index]
+
+            target = self.forward_masks[index][offset]
+            if target is not None and not state & target:
+                states.append(((index, Direction.FORWARD, 1), (state ^ bodies[offset] ^ bodies[offset + 1]) + (1 << shift)))
+
+            target = self.backward_masks[index][offset]
+            if target is not None and not state & target:
+                states.append(((index, Direction.BACKWARD, 1), (state ^ bodies[offset] ^ bodies[offset - 1]) - (1 << shift)))
+        return states
+
+    def slide_successors(self, state, vehicles=None):
+        """Return the (move, state) pairs reachable by sliding one vehicle any number of free cells."""
+        states = []
+        field_mask = self.field_mask
+        for index in self.movable if vehicles is None else vehicles:
+            shift = self.shifts[index]
+            offset = (state >> shift) & field_mask
+            bodies = self.body_masks[index]
+            body = bodies[offset]
+
+            forward_masks = self.forward_masks[index]
+            distance = 1
+            while forward_masks[offset + distance - 1] is not None and not state & forward_masks[offset + distance - 1]:
+                states.append(((index, Direction.FORWARD, distance), (state ^ body ^ bodies[offset + distance]) + (distance << shift)))
+                distance += 1
+
+            backward_masks = self.backward_masks[index]
+            distance = 1
+            while backward_masks[offset - distance + 1] is not None and not state & backward_masks[offset - distance + 1]:
+                states.append(((index, Direction.BACKWARD, distance), (state ^ body ^ bodies[offset - distance]) - (distance << shift)))
+                distance += 1
+        return states
+
+    @staticmethod
+    def inverse_move(move):
+        """Return the move that undoes the given move."""
+        index, direction, distance = move
+        return index, Direction.BACKWARD if direction == Direction.FORWARD else Direction.FORWARD, distance
+
+    def count_moves(self, cells):
+        """Return the fewest moves needed to slide one vehicle the given number of cells."""
+        if self.move_model == MoveModel.SLIDE:
+            return min(cells, 1)
+        return cells
+
+    def is_solved(self, state):
+        """Check if the main vehicle touches the right edge of the board."""
+        row, column = self.get_main_location(state)
+        return column == self.width - 1
+
+    def goal_states(self, vehicles=None):
+        """Yield every legal placement of the vehicles in which the main vehicle has reached the exit.
+
+        Only the given vehicle indexes are placed, all vehicles by default; the others are left
+        off the board. Broken-down vehicles never move, so they stay where they were loaded.
+        There can be far too many placements to hold at once, so they are generated lazily.
+        """
+        vehicles = range(len(self.vehicles)) if vehicles is None else vehicles
+        choices = {}
+        for index in vehicles:
+            offsets = range(self.max_offsets[index] + 1)
+            if index == self.main_index:
+                front = self.lengths[index] - 1
+                offsets = [offset for offset in offsets if self.lane_cells[index][offset + front] % self.width == self.width - 1]
+            elif index not in self.movable:
+                offsets = [self.get_offset(self.initial_state, index)]
+            choices[index] = offsets
+
+        stack = [(0, tuple(choices))]
+        while stack:
+            state, remaining = stack.pop()
+            if not remaining:
+                yield state
+                continue
+            # Placing the vehicle with the fewest free offsets next, and dropping placements that
+            # leave some vehicle no room at all, keeps the enumeration out of dead ends.
+            free = [[offset for offset in choices[index] if not state & self.body_masks[index][offset]] for index in remaining]
+            if not all(free):
+                continue
+            position = min(range(len(remaining)), key=lambda position: len(free[position]))
+            index = remaining[position]
+            rest = remaining[:position] + remaining[position + 1 :]
+            for offset in free[position]:
+                stack.append((state | self.body_masks[index][offset] | (offset << self.shifts[index]), rest))
+
+    def to_grid(self, state):
+        """Rebuild a column-major grid of vehicles for display."""
+        grid = [[0 for _ in range(self.height)] for _ in range(self.width)]
+        for index, name in enumerate(self.names):
+            vehicle = Vehicle(name=name, type=self.vehicles[index].type)
+            offset = self.get_offset(state, index)
+            first = self.lane_cells[index][offset]
+            last = self.lane_cells[index][offset + self.lengths[index] - 1]
+            vehicle.set_start_location(first % self.width, first // self.width)
+            vehicle.set_end_location(last % self.width, last // self.width)
+            for location in vehicle.get_occupied_locations():
+                grid[location["x"]][location["y"]] = vehicle
+        return grid
+
+    def from_grid(self, grid):
+        """Encode a column-major grid of vehicles as a state."""
+        return self.encode(self.vehicle_offsets(self.collect_vehicles(grid)))
+
+    def get_board_text(self, state, canonical=False):
+        """Return a state in the board file format: one line per row, vehicle names and dots.
+
+        With canonical set, vehicles are written with their canonical labels, so boards that
+        differ only in vehicle names give the same text.
+        """
+        cells = ["."] * self.cells
+        for index, name in enumerate(self.canonical_names if canonical else self.names):
+            offset = self.get_offset(state, index)
+            for cell in self.lane_cells[index][offset:offset + self.lengths[index]]:
+                cells[cell] = name
+        return "\n".join("".join(cells[row * self.width:(row + 1) * self.width]) for row in range(self.height))
+
+    def get_vehicle(self, index):
+        """Return the loaded vehicle object for an index."""
+        return self.vehicles[index]
+
+    def index_of(self, name):
+        """Return the index of the vehicle with the given name."""
+        return self.indexes[name]
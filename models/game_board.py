@@ -1,7 +1,3 @@
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-
-
 class GameBoard:
     """Represents the game board for the Rush Hour game."""
 
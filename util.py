@@ -22,6 +22,11 @@ class Orientation(Enum):
     HORIZONTAL = "HORIZONTAL"
 
 
+class MoveModel(Enum):
+    STEP = "step"  # a move slides one vehicle by exactly one cell
+    SLIDE = "slide"  # a move slides one vehicle by any number of free cells
+
+
 """
  Data structures useful for implementing SearchAgents
 """
@@ -102,6 +107,49 @@ class PriorityQueue:
         return len(self.heap) == 0
 
 
+class BucketQueue:
+    """
+    Implements a priority queue for small integer priorities, such as the
+    f-values of A* with unit move costs. Items are kept in buckets keyed by
+    priority and, inside a bucket, by an integer depth. pop returns an item of
+    the lowest priority and, among those, of the greatest depth, so ties go to
+    the nodes closest to a goal. Both operations take constant time for the
+    few distinct priorities and depths a search produces.
+
+    Unlike PriorityQueue, items never need to be comparable with each other.
+    """
+
+    def __init__(self):
+        self.buckets = {}
+        self.minimum = None
+        self.size = 0
+
+    def push(self, item, priority, depth=0):
+        self.buckets.setdefault(priority, {}).setdefault(depth, []).append(item)
+        if self.minimum is None or priority < self.minimum:
+            self.minimum = priority
+        self.size += 1
+
+    def pop(self):
+        bucket = self.buckets[self.minimum]
+        depth = max(bucket)
+        items = bucket[depth]
+        item = items.pop()
+        if not items:
+            del bucket[depth]
+            if not bucket:
+                del self.buckets[self.minimum]
+                self.minimum = min(self.buckets) if self.buckets else None
+        self.size -= 1
+        return item
+
+    def isEmpty(self):
+        return self.size == 0
+
+    def __len__(self):
+        return self.size
+
+
 class PriorityQueueWithFunction(PriorityQueue):
     """
     Implements a priority queue with the same push/pop signature of the
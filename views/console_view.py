@@ -73,6 +73,7 @@ class ConsoleView(object):
                 for column_index, move in enumerate(solution[i] for i in collection):
                     vehicle = move[0]
                     direction = move[1]
+                    distance = move[2]
                     direction_name = ""
                     if vehicle.get_orientation() == Orientation.HORIZONTAL and direction == Direction.FORWARD:
                         direction_name = "Right"
@@ -86,7 +87,7 @@ class ConsoleView(object):
                     if vehicle.get_orientation() == Orientation.VERTICAL and direction == Direction.BACKWARD:
                         direction_name = "Up"
 
-                    display_text = "%02d: %s -> %s " % (collection[column_index] + 1, vehicle.get_name(), direction_name)
+                    display_text = "%02d: %s -> %s x%d " % (collection[column_index] + 1, vehicle.get_name(), direction_name, distance)
                     print(display_text)
                     print(" " * (20 - len(display_text)))
 